@@ -1,6 +1,7 @@
 from flask import Flask, request
 from queue import Queue
 from services.webhook import send_webhook
+from services.job_status import set_job_status
 import threading
 import uuid
 import os
@@ -8,6 +9,7 @@ import time
 from version import BUILD_NUMBER  # Import the BUILD_NUMBER
 
 MAX_QUEUE_LENGTH = int(os.environ.get('MAX_QUEUE_LENGTH', 0))
+QUEUE_WORKERS = int(os.environ.get('QUEUE_WORKERS', 1))
 
 def create_app():
     app = Flask(__name__)
@@ -23,9 +25,11 @@ def create_app():
             queue_time = time.time() - queue_start_time
             run_start_time = time.time()
             pid = os.getpid()  # Get the PID of the actual processing thread
+            set_job_status(job_id, "running", queue_time=round(queue_time, 3))
             response = task_func()
             run_time = time.time() - run_start_time
             total_time = time.time() - queue_start_time
+            set_job_status(job_id, "done" if response[2] == 200 else "failed", code=response[2], run_time=round(run_time, 3))
 
             response_data = {
                 "endpoint": response[1],
@@ -47,8 +51,9 @@ def create_app():
 
             task_queue.task_done()
 
-    # Start the queue processing in a separate thread
-    threading.Thread(target=process_queue, daemon=True).start()
+    # Start the queue processing threads; more than one lets queued jobs run concurrently
+    for _ in range(max(QUEUE_WORKERS, 1)):
+        threading.Thread(target=process_queue, daemon=True).start()
 
     # Decorator to add tasks to the queue or bypass it
     def queue_task(bypass_queue=False):
@@ -61,8 +66,13 @@ def create_app():
                 
                 if bypass_queue or 'webhook_url' not in data:
                     
+                    # Quick bypass endpoints (status, fonts, ...) are not tracked as jobs
+                    if not bypass_queue:
+                        set_job_status(job_id, "running", id=data.get("id"), endpoint=request.path)
                     response = f(job_id=job_id, data=data, *args, **kwargs)
                     run_time = time.time() - start_time
+                    if not bypass_queue:
+                        set_job_status(job_id, "done" if response[2] == 200 else "failed", code=response[2], run_time=round(run_time, 3))
                     return {
                         "code": response[2],
                         "id": data.get("id"),
@@ -90,6 +100,7 @@ def create_app():
                             "build_number": BUILD_NUMBER  # Add build number to response
                         }, 429
                     
+                    set_job_status(job_id, "queued", id=data.get("id"), endpoint=request.path, webhook_url=data.get("webhook_url"))
                     task_queue.put((job_id, data, lambda: f(job_id=job_id, data=data, *args, **kwargs), start_time))
                     
                     return {
@@ -139,11 +150,17 @@ def create_app():
     from routes.v1.media.media_download import v1_media_download_bp
     from routes.v1.media.media_proxy import v1_media_proxy_bp
     from routes.v1.media.transform.media_to_mp3 import v1_media_transform_mp3_bp
+    from routes.v1.media.transform.media_to_mp3_batch import v1_media_transform_mp3_batch_bp
     from routes.v1.video.concatenate import v1_video_concatenate_bp
     from routes.v1.video.caption_video import v1_video_caption_bp
+    from routes.v1.video.caption_batch import v1_video_caption_batch_bp
     from routes.v1.image.transform.image_to_video import v1_image_transform_video_bp
+    from routes.v1.image.transform.slideshow import v1_image_transform_slideshow_bp
     from routes.v1.toolkit.test import v1_toolkit_test_bp
     from routes.v1.toolkit.authenticate import v1_toolkit_auth_bp
+    from routes.v1.toolkit.fonts import v1_toolkit_fonts_bp
+    from routes.v1.toolkit.job_status import v1_toolkit_job_status_bp
+    from routes.v1.toolkit.metrics import v1_toolkit_metrics_bp
     from routes.v1.code.execute.execute_python import v1_code_execute_bp
 
     app.register_blueprint(v1_ffmpeg_compose_bp)
@@ -151,13 +168,23 @@ def create_app():
     app.register_blueprint(v1_media_download_bp)
     app.register_blueprint(v1_media_proxy_bp)
     app.register_blueprint(v1_media_transform_mp3_bp)
+    app.register_blueprint(v1_media_transform_mp3_batch_bp)
     app.register_blueprint(v1_video_concatenate_bp)
     app.register_blueprint(v1_video_caption_bp)
+    app.register_blueprint(v1_video_caption_batch_bp)
     app.register_blueprint(v1_image_transform_video_bp)
+    app.register_blueprint(v1_image_transform_slideshow_bp)
     app.register_blueprint(v1_toolkit_test_bp)
     app.register_blueprint(v1_toolkit_auth_bp)
+    app.register_blueprint(v1_toolkit_fonts_bp)
+    app.register_blueprint(v1_toolkit_job_status_bp)
+    app.register_blueprint(v1_toolkit_metrics_bp)
     app.register_blueprint(v1_code_execute_bp)
 
+    # Build (or load) the font index up front so caption requests never scan font directories
+    from services.font_index import get_font_index
+    threading.Thread(target=get_font_index, daemon=True).start()
+
     return app
 
 app = create_app()
@@ -0,0 +1,148 @@
+"""
+Micro-benchmark for ASS caption event generation on a synthetic 3-hour transcript.
+
+Times the previous per-word implementation of the highlight style (whole line rebuilt
+for every word, one re.sub per replace rule per word) against the event builder in
+services.v1.video.caption_events, checks that both produce identical output, and
+reports the event builder's time for every style, including the one-event-per-line
+highlight mode (event_mode 'per_line').
+
+Usage:
+    python -m benchmarks.caption_events_benchmark [--hours 3] [--words-per-segment 40] [--rules 20]
+"""
+import io
+import re
+import time
+import random
+import argparse
+from services.v1.video.caption_events import (
+    TextTransformer, format_ass_time, classic_events, karaoke_events,
+    current_word_events, highlight_line_events, word_by_word_events, write_events
+)
+
+POSITION_TAG = "{\\an5\\pos(960,540)}"
+WORD_COLOR = "&H0000FFFF"
+LINE_COLOR = "&H00FFFFFF"
+
+VOCABULARY = (
+    "the quick brown fox jumps over lazy dog and then we talk about video captions "
+    "subtitles rendering pipeline performance latency throughput toolkit api"
+).split()
+
+def synthetic_transcript(hours, words_per_segment, seed=0):
+    rng = random.Random(seed)
+    segments = []
+    t = 0.0
+    while t < hours * 3600:
+        words = []
+        for _ in range(words_per_segment):
+            duration = rng.uniform(0.15, 0.6)
+            words.append({'word': ' ' + rng.choice(VOCABULARY), 'start': t, 'end': t + duration})
+            t += duration
+        segments.append({
+            'start': words[0]['start'],
+            'end': words[-1]['end'],
+            'text': ''.join(w['word'] for w in words),
+            'words': words
+        })
+    return {'segments': segments}
+
+def legacy_process_subtitle_text(text, replace_dict, all_caps):
+    for old_word, new_word in replace_dict.items():
+        text = re.sub(re.escape(old_word), new_word, text, flags=re.IGNORECASE)
+    if all_caps:
+        text = text.upper()
+    return text
+
+def legacy_highlight(transcription_result, replace_dict, all_caps, max_words_per_line):
+    events = []
+    for segment in transcription_result['segments']:
+        words = segment.get('words', [])
+        if not words:
+            continue
+        processed_words = []
+        for w_info in words:
+            w = legacy_process_subtitle_text(w_info.get('word', ''), replace_dict, all_caps)
+            if w:
+                processed_words.append((w, w_info['start'], w_info['end']))
+        if not processed_words:
+            continue
+        if max_words_per_line > 0:
+            line_sets = [processed_words[i:i+max_words_per_line] for i in range(0, len(processed_words), max_words_per_line)]
+        else:
+            line_sets = [processed_words]
+        for line_set in line_sets:
+            for idx, (word, w_start, w_end) in enumerate(line_set):
+                line_words = []
+                for w_idx, (w_text, _, _) in enumerate(line_set):
+                    if w_idx == idx:
+                        line_words.append(f"{{\\c{WORD_COLOR}}}{w_text}{{\\c{LINE_COLOR}}}")
+                    else:
+                        line_words.append(w_text)
+                full_text = ' '.join(line_words)
+                events.append(
+                    f"Dialogue: 0,{format_ass_time(w_start)},{format_ass_time(w_end)},Default,,0,0,0,,"
+                    f"{POSITION_TAG}{{\\c{LINE_COLOR}}}{full_text}"
+                )
+    return "\n".join(events) + "\n"
+
+def render(events):
+    buffer = io.StringIO()
+    count = write_events(buffer, events)
+    return buffer.getvalue(), count
+
+def timed(fn):
+    start_time = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start_time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hours', type=float, default=3)
+    parser.add_argument('--words-per-segment', type=int, default=40)
+    parser.add_argument('--max-words-per-line', type=int, default=0)
+    parser.add_argument('--rules', type=int, default=20, help="Number of find/replace rules")
+    args = parser.parse_args()
+
+    transcript = synthetic_transcript(args.hours, args.words_per_segment)
+    segments = transcript['segments']
+    word_count = sum(len(s['words']) for s in segments)
+    replace_dict = {f"term{i}": f"TERM{i}" for i in range(args.rules - 1)}
+    replace_dict['fox'] = 'wolf'
+    print(f"{len(segments)} segments, {word_count} words, {len(replace_dict)} replace rules")
+
+    def transform():
+        return TextTransformer(replace_dict, True)
+
+    legacy_output, legacy_time = timed(lambda: legacy_highlight(transcript, replace_dict, True, args.max_words_per_line))
+    (output, count), new_time = timed(lambda: render(current_word_events(
+        segments, transform(), POSITION_TAG, args.max_words_per_line, LINE_COLOR,
+        f"{{\\c{WORD_COLOR}}}", f"{{\\c{LINE_COLOR}}}"
+    )))
+    if output != legacy_output:
+        raise SystemExit("highlight output differs from the legacy implementation")
+
+    print(f"{'style':<16}{'events':>10}{'time (s)':>10}{'MB':>8}")
+    print(f"{'highlight*':<16}{count:>10}{legacy_time:>10.2f}{len(legacy_output) / 1e6:>8.1f}")
+    styles = {
+        'classic': lambda: classic_events(segments, transform(), POSITION_TAG, args.max_words_per_line),
+        'karaoke': lambda: karaoke_events(segments, transform(), POSITION_TAG, args.max_words_per_line, WORD_COLOR),
+        'highlight': lambda: current_word_events(
+            segments, transform(), POSITION_TAG, args.max_words_per_line, LINE_COLOR,
+            f"{{\\c{WORD_COLOR}}}", f"{{\\c{LINE_COLOR}}}"
+        ),
+        'highlight/line': lambda: highlight_line_events(
+            segments, transform(), POSITION_TAG, args.max_words_per_line, LINE_COLOR, WORD_COLOR
+        ),
+        'underline': lambda: current_word_events(
+            segments, transform(), POSITION_TAG, args.max_words_per_line, LINE_COLOR, "{\\u1}", "{\\u0}"
+        ),
+        'word_by_word': lambda: word_by_word_events(segments, transform(), POSITION_TAG, WORD_COLOR)
+    }
+    for style, events in styles.items():
+        (output, count), elapsed = timed(lambda: render(events()))
+        print(f"{style:<16}{count:>10}{elapsed:>10.2f}{len(output) / 1e6:>8.1f}")
+    print(f"* previous implementation; highlight speedup {legacy_time / new_time:.1f}x with identical output")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Compare the previous image-to-video filter chain (image looped at the input frame rate
+and scaled to 7680x4320 before zoompan) with the Ken Burns renderer in
+services.v1.image.transform.image_to_video at each quality tier: wall time and peak
+RSS of the ffmpeg process, and output size.
+
+A synthetic image is generated with Pillow unless one is given. Requires ffmpeg.
+
+Usage:
+    python -m benchmarks.image_to_video_benchmark [--image photo.jpg] [--length 5] [--frame-rate 30] [--zoom-speed 3]
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+from PIL import Image, ImageDraw
+from services.v1.image.transform.image_to_video import QUALITY_TIERS, build_ken_burns_command, working_size
+
+def synthetic_image(path, size=(4000, 3000), seed=0):
+    # Fine detail makes scaling cost and zoom jitter visible
+    rng = random.Random(seed)
+    image = Image.new('RGB', size, (30, 30, 30))
+    draw = ImageDraw.Draw(image)
+    for _ in range(4000):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        radius = rng.randrange(2, 40)
+        color = tuple(rng.randrange(256) for _ in range(3))
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=color)
+    image.save(path, quality=92)
+
+def legacy_command(image_path, output_path, length, frame_rate, zoom_speed, output_size):
+    total_frames = int(length * frame_rate)
+    zoom_factor = 1 + (zoom_speed * length)
+    scale_dims = "7680:4320" if output_size[0] > output_size[1] else "4320:7680"
+    return [
+        'ffmpeg', '-y', '-framerate', str(frame_rate), '-loop', '1', '-i', image_path,
+        '-vf', f"scale={scale_dims},zoompan=z='min(1+({zoom_speed}*{length})*on/{total_frames}, {zoom_factor})':d={total_frames}:x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':s={output_size[0]}x{output_size[1]}",
+        '-c:v', 'libx264', '-t', str(length), '-pix_fmt', 'yuv420p', output_path
+    ]
+
+def measure(command):
+    """Wall time and peak RSS (MB) of one ffmpeg process."""
+    start_time = time.time()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    stderr = process.stderr.read()
+    # wait4 reports the rusage of this child alone; ru_maxrss is in kilobytes on Linux
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {stderr.decode(errors='replace')[-2000:]}")
+    return time.time() - start_time, usage.ru_maxrss / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--image', help="Image to animate; a synthetic 4000x3000 image by default")
+    parser.add_argument('--length', type=float, default=5)
+    parser.add_argument('--frame-rate', type=int, default=30)
+    parser.add_argument('--zoom-speed', type=float, default=3, help="Percent per second, as in the API")
+    args = parser.parse_args()
+
+    zoom_speed = args.zoom_speed / 100
+    zoom_factor = 1 + zoom_speed * args.length
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        image_path = args.image
+        if not image_path:
+            image_path = os.path.join(work_dir, 'image.jpg')
+            synthetic_image(image_path)
+        with Image.open(image_path) as image:
+            output_size = (1920, 1080) if image.width > image.height else (1080, 1920)
+
+        variants = [('previous*', legacy_command, '7680x4320' if output_size[0] > output_size[1] else '4320x7680')]
+        for quality in QUALITY_TIERS:
+            command = lambda *a, quality=quality: build_ken_burns_command(*a, quality=quality)
+            variants.append((quality, command, 'x'.join(map(str, working_size(output_size, zoom_factor, quality)))))
+
+        print(f"{args.length}s at {args.frame_rate}fps, zoom to {zoom_factor:.2f}x, output {output_size[0]}x{output_size[1]}")
+        print(f"{'renderer':<12}{'working size':>14}{'time (s)':>10}{'peak RSS (MB)':>15}{'output (MB)':>13}")
+        baseline = None
+        for name, build, size in variants:
+            output_path = os.path.join(work_dir, f"{name.strip('*')}.mp4")
+            elapsed, peak_rss = measure(build(image_path, output_path, args.length, args.frame_rate, zoom_speed, output_size))
+            baseline = baseline or elapsed
+            print(
+                f"{name:<12}{size:>14}{elapsed:>10.2f}{peak_rss:>15.0f}"
+                f"{os.path.getsize(output_path) / 1e6:>13.1f}   {baseline / elapsed:.1f}x"
+            )
+        print("* previous filter chain")
+
+if __name__ == '__main__':
+    main()
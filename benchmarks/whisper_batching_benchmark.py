@@ -0,0 +1,54 @@
+"""
+Compare transcription throughput of the micro-batching scheduler against the
+unbatched path on a set of short clips.
+
+Usage:
+    python -m benchmarks.whisper_batching_benchmark clip1.wav clip2.mp3 ... [--model base] [--repeat 4]
+"""
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import whisper
+from services.whisper_batcher import WhisperBatcher, MAX_BATCH_CLIP_SECONDS
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('clips', nargs='+', help=f"Audio/video files of at most {MAX_BATCH_CLIP_SECONDS}s each")
+    parser.add_argument('--model', default='base')
+    parser.add_argument('--repeat', type=int, default=4, help="Times each clip is submitted, to simulate a burst")
+    parser.add_argument('--window-ms', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=16)
+    args = parser.parse_args()
+
+    model = whisper.load_model(args.model)
+    audios = [whisper.load_audio(path) for path in args.clips] * args.repeat
+    too_long = [len(audio) for audio in audios if len(audio) > MAX_BATCH_CLIP_SECONDS * whisper.audio.SAMPLE_RATE]
+    if too_long:
+        parser.error(f"All clips must be at most {MAX_BATCH_CLIP_SECONDS}s long")
+    fp16 = model.device.type != 'cpu'
+
+    # Warm-up so neither path pays one-time initialisation costs
+    model.transcribe(audios[0], fp16=fp16)
+
+    start_time = time.time()
+    for audio in audios:
+        model.transcribe(audio, fp16=fp16)
+    unbatched_time = time.time() - start_time
+
+    batcher = WhisperBatcher(model, window_ms=args.window_ms, max_batch_size=args.batch_size)
+    start_time = time.time()
+    # Submit from concurrent threads, as parallel jobs would
+    with ThreadPoolExecutor(max_workers=len(audios)) as executor:
+        futures = list(executor.map(batcher.submit, audios))
+    for future in futures:
+        future.result()
+    batched_time = time.time() - start_time
+
+    print(f"Clips:      {len(audios)} ({len(args.clips)} unique x {args.repeat})")
+    print(f"Unbatched:  {unbatched_time:.2f}s, {len(audios) / unbatched_time:.2f} clips/s")
+    print(f"Batched:    {batched_time:.2f}s, {len(audios) / batched_time:.2f} clips/s")
+    print(f"Speedup:    {unbatched_time / batched_time:.2f}x")
+    print(f"Batcher:    {batcher.get_stats()}")
+
+if __name__ == '__main__':
+    main()
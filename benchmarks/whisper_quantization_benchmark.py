@@ -0,0 +1,95 @@
+"""
+Compare float32 and int8 dynamic-quantized Whisper inference on CPU: wall time,
+peak RSS and word error rate against reference transcripts.
+
+Each sample is an audio/video file with its reference transcript next to it in a
+.txt file of the same name (e.g. samples/meeting.wav + samples/meeting.txt).
+
+Usage:
+    python -m benchmarks.whisper_quantization_benchmark benchmarks/samples/*.wav [--model base]
+"""
+import os
+import re
+import time
+import argparse
+import resource
+import multiprocessing
+
+def normalize_words(text):
+    return re.sub(r"[^\w\s']", ' ', text.lower()).split()
+
+def word_error_rate(reference, hypothesis):
+    """Word-level Levenshtein distance divided by the reference length."""
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, start=1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, start=1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+    return previous[-1] / max(len(ref), 1)
+
+def run_variant(model_size, quantization, samples, results):
+    # Runs in a fresh process so peak RSS is attributable to a single variant
+    import whisper
+    from services.whisper_toolkit import get_model
+
+    load_start = time.time()
+    model = get_model(model_size, quantization)
+    load_time = time.time() - load_start
+
+    transcribe_time = 0.0
+    errors = []
+    for audio_path, reference in samples:
+        audio = whisper.load_audio(audio_path)
+        start_time = time.time()
+        result = model.transcribe(audio, fp16=False)
+        transcribe_time += time.time() - start_time
+        errors.append(word_error_rate(reference, result['text']))
+
+    results[quantization] = {
+        'load_time': load_time,
+        'transcribe_time': transcribe_time,
+        # ru_maxrss is reported in kilobytes on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'wer': sum(errors) / len(errors)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('samples', nargs='+', help="Audio/video files with a matching .txt reference transcript")
+    parser.add_argument('--model', default='base')
+    args = parser.parse_args()
+
+    samples = []
+    for audio_path in args.samples:
+        reference_path = os.path.splitext(audio_path)[0] + '.txt'
+        if not os.path.exists(reference_path):
+            parser.error(f"Missing reference transcript {reference_path}")
+        with open(reference_path, 'r', encoding='utf-8') as f:
+            samples.append((audio_path, f.read()))
+
+    manager = multiprocessing.Manager()
+    results = manager.dict()
+    for quantization in ('none', 'int8'):
+        process = multiprocessing.get_context('spawn').Process(
+            target=run_variant, args=(args.model, quantization, samples, results)
+        )
+        process.start()
+        process.join()
+
+    print(f"{'variant':<10}{'load (s)':>10}{'transcribe (s)':>16}{'peak RSS (MB)':>15}{'WER':>8}")
+    for quantization, label in (('none', 'float32'), ('int8', 'int8')):
+        r = results[quantization]
+        print(f"{label:<10}{r['load_time']:>10.2f}{r['transcribe_time']:>16.2f}{r['peak_rss_mb']:>15.0f}{r['wer']:>8.3f}")
+
+    speedup = results['none']['transcribe_time'] / results['int8']['transcribe_time']
+    print(f"int8 speedup: {speedup:.2f}x, WER delta: {results['int8']['wer'] - results['none']['wer']:+.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,7 @@ from flask import Blueprint
 from app_utils import *
 import logging
 from services.audio_mixing import process_audio_mixing
+from services.encoding_profiles import PROFILE_SCHEMA
 from services.authentication import authenticate
 from services.cloud_storage import upload_file
 
@@ -18,10 +19,42 @@ logger = logging.getLogger(__name__)
         "video_vol": {"type": "number", "minimum": 0, "maximum": 100},
         "audio_vol": {"type": "number", "minimum": 0, "maximum": 100},
         "output_length": {"type": "string", "enum": ["video", "audio"]},
+        "tracks": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "audio_url": {"type": "string", "format": "uri"},
+                    "volume": {"type": "number", "minimum": 0, "maximum": 200},
+                    "offset": {"type": "number", "minimum": 0},
+                    "fade_in": {"type": "number", "minimum": 0},
+                    "fade_out": {"type": "number", "minimum": 0},
+                    "loop": {"type": "boolean"},
+                    "duck": {"type": "boolean"}
+                },
+                "required": ["audio_url"],
+                "additionalProperties": False
+            },
+            "minItems": 1,
+            "maxItems": 16
+        },
+        "ducking": {
+            "type": "object",
+            "properties": {
+                "threshold": {"type": "number", "minimum": 0.001, "maximum": 1},
+                "ratio": {"type": "number", "minimum": 1, "maximum": 20},
+                "attack": {"type": "number", "minimum": 0.01, "maximum": 2000},
+                "release": {"type": "number", "minimum": 0.01, "maximum": 9000}
+            },
+            "additionalProperties": False
+        },
+        "keep_video_audio": {"type": "boolean"},
+        "profile": PROFILE_SCHEMA,
         "webhook_url": {"type": "string", "format": "uri"},
         "id": {"type": "string"}
     },
-    "required": ["video_url", "audio_url"],
+    "required": ["video_url"],
+    "anyOf": [{"required": ["audio_url"]}, {"required": ["tracks"]}],
     "additionalProperties": False
 })
 @queue_task_wrapper(bypass_queue=False)
@@ -34,12 +67,19 @@ def audio_mixing(job_id, data):
     webhook_url = data.get('webhook_url')
     id = data.get('id')
 
-    logger.info(f"Job {job_id}: Received audio mixing request for {video_url} and {audio_url}")
+    logger.info(
+        f"Job {job_id}: Received audio mixing request for video {video_url}, "
+        f"audio_url {audio_url}, {len(data.get('tracks') or [])} tracks"
+    )
 
     try:
         # Process audio and video mixing
         output_filename = process_audio_mixing(
-            video_url, audio_url, video_vol, audio_vol, output_length, job_id, webhook_url
+            video_url, audio_url, video_vol, audio_vol, output_length, job_id, webhook_url,
+            tracks=data.get('tracks'),
+            ducking=data.get('ducking'),
+            keep_video_audio=data.get('keep_video_audio', False),
+            profile=data.get('profile')
         )
 
         # Upload the mixed file using the unified upload_file() method
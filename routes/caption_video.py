@@ -2,6 +2,7 @@ from flask import Blueprint, current_app
 from app_utils import *
 import logging
 from services.caption_video import process_captioning
+from services.encoding_profiles import PROFILE_SCHEMA
 from services.authentication import authenticate
 from services.cloud_storage import upload_file
 import os
@@ -28,6 +29,7 @@ logger = logging.getLogger(__name__)
                 "required": ["option", "value"]
             }
         },
+        "profile": PROFILE_SCHEMA,
         "webhook_url": {"type": "string", "format": "uri"},
         "id": {"type": "string"}
     },
@@ -58,7 +60,7 @@ def caption_video(job_id, data):
         caption_type = "srt"
 
     try:
-        output_filename = process_captioning(video_url, captions, caption_type, options, job_id)
+        output_filename = process_captioning(video_url, captions, caption_type, options, job_id, data.get('profile'))
         logger.info(f"Job {job_id}: Captioning process completed successfully")
 
         # Upload the captioned video using the unified upload_file() method
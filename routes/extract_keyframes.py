@@ -1,7 +1,7 @@
 from flask import Blueprint
 from app_utils import *
 import logging
-from services.extract_keyframes import process_keyframe_extraction
+from services.extract_keyframes import process_keyframe_extraction, remove_keyframes
 from services.authentication import authenticate
 from services.cloud_storage import upload_file
 
@@ -14,6 +14,10 @@ logger = logging.getLogger(__name__)
     "type": "object",
     "properties": {
         "video_url": {"type": "string", "format": "uri"},
+        "max_frames": {"type": "integer", "minimum": 1},
+        "width": {"type": "integer", "minimum": 16, "maximum": 7680},
+        "format": {"type": "string", "enum": ["jpg", "webp"]},
+        "quality": {"type": "integer", "minimum": 1, "maximum": 100},
         "webhook_url": {"type": "string", "format": "uri"},
         "id": {"type": "string"}
     },
@@ -30,7 +34,13 @@ def extract_keyframes(job_id, data):
 
     try:
         # Process keyframe extraction
-        image_paths = process_keyframe_extraction(video_url, job_id)
+        image_paths = process_keyframe_extraction(
+            video_url, job_id,
+            max_frames=data.get('max_frames'),
+            width=data.get('width'),
+            image_format=data.get('format', 'jpg'),
+            quality=data.get('quality')
+        )
 
         # Upload each extracted keyframe and collect the cloud URLs
         image_urls = []
@@ -46,3 +56,5 @@ def extract_keyframes(job_id, data):
     except Exception as e:
         logger.error(f"Job {job_id}: Error during keyframe extraction - {str(e)}")
         return str(e), "/extract-keyframes", 500
+    finally:
+        remove_keyframes(job_id)
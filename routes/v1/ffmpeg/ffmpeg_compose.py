@@ -20,6 +20,7 @@ logger = logging.getLogger(__name__)
                 "type": "object",
                 "properties": {
                     "file_url": {"type": "string", "format": "uri"},
+                    "stream": {"type": "boolean"},
                     "options": {
                         "type": "array",
                         "items": {
@@ -82,6 +83,7 @@ logger = logging.getLogger(__name__)
             "type": "object",
             "properties": {
                 "thumbnail": {"type": "boolean"},
+                "thumbnail_time": {"type": "number", "minimum": 0},
                 "filesize": {"type": "boolean"},
                 "duration": {"type": "boolean"},
                 "bitrate": {"type": "boolean"},
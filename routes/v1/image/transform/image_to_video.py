@@ -1,7 +1,8 @@
 from flask import Blueprint
 from app_utils import *
 import logging
-from services.v1.image.transform.image_to_video import process_image_to_video
+from services.v1.image.transform.image_to_video import process_image_to_video, DEFAULT_QUALITY
+from services.encoding_profiles import PROFILE_SCHEMA
 from services.authentication import authenticate
 from services.cloud_storage import upload_file
 
@@ -17,6 +18,8 @@ logger = logging.getLogger(__name__)
         "length": {"type": "number", "minimum": 1, "maximum": 60},
         "frame_rate": {"type": "integer", "minimum": 15, "maximum": 60},
         "zoom_speed": {"type": "number", "minimum": 0, "maximum": 100},
+        "quality": {"type": "string", "enum": ["fast", "balanced", "high"]},
+        "profile": PROFILE_SCHEMA,
         "webhook_url": {"type": "string", "format": "uri"},
         "id": {"type": "string"}
     },
@@ -37,7 +40,9 @@ def image_to_video(job_id, data):
     try:
         # Process image to video conversion
         output_filename = process_image_to_video(
-            image_url, length, frame_rate, zoom_speed, job_id, webhook_url
+            image_url, length, frame_rate, zoom_speed, job_id, webhook_url,
+            quality=data.get('quality', DEFAULT_QUALITY),
+            profile=data.get('profile')
         )
 
         # Upload the resulting file using the unified upload_file() method
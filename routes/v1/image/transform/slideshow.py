@@ -0,0 +1,90 @@
+import os
+from flask import Blueprint
+from app_utils import *
+import logging
+from services.v1.image.transform.slideshow import process_slideshow
+from services.v1.image.transform.image_to_video import DEFAULT_QUALITY
+from services.encoding_profiles import PROFILE_SCHEMA
+from services.authentication import authenticate
+from services.cloud_storage import upload_file
+
+v1_image_transform_slideshow_bp = Blueprint('v1_image_transform_slideshow', __name__)
+logger = logging.getLogger(__name__)
+
+TRANSITION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "type": {
+            "type": "string",
+            "enum": [
+                "none", "fade", "fadeblack", "fadewhite", "dissolve", "wipeleft", "wiperight",
+                "wipeup", "wipedown", "slideleft", "slideright", "slideup", "slidedown",
+                "smoothleft", "smoothright", "circleopen", "circleclose", "radial", "zoomin"
+            ]
+        },
+        "duration": {"type": "number", "minimum": 0, "maximum": 5}
+    },
+    "required": ["type"],
+    "additionalProperties": False
+}
+
+@v1_image_transform_slideshow_bp.route('/v1/image/transform/slideshow', methods=['POST'])
+@authenticate
+@validate_payload({
+    "type": "object",
+    "properties": {
+        "images": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "image_url": {"type": "string", "format": "uri"},
+                    "duration": {"type": "number", "minimum": 0.5, "maximum": 60},
+                    "zoom_speed": {"type": "number", "minimum": 0, "maximum": 100},
+                    "transition": TRANSITION_SCHEMA
+                },
+                "required": ["image_url", "duration"],
+                "additionalProperties": False
+            },
+            "minItems": 1,
+            "maxItems": 50
+        },
+        "transition": TRANSITION_SCHEMA,
+        "frame_rate": {"type": "integer", "minimum": 15, "maximum": 60},
+        "quality": {"type": "string", "enum": ["fast", "balanced", "high"]},
+        "profile": PROFILE_SCHEMA,
+        "webhook_url": {"type": "string", "format": "uri"},
+        "id": {"type": "string"}
+    },
+    "required": ["images"],
+    "additionalProperties": False
+})
+@queue_task_wrapper(bypass_queue=False)
+def image_slideshow(job_id, data):
+    images = data['images']
+
+    logger.info(f"Job {job_id}: Received slideshow request for {len(images)} images")
+
+    try:
+        output_filename = process_slideshow(
+            images,
+            job_id,
+            frame_rate=data.get('frame_rate', 30),
+            quality=data.get('quality', DEFAULT_QUALITY),
+            default_transition=data.get('transition'),
+            profile=data.get('profile')
+        )
+
+        # Only the finished slideshow is uploaded
+        cloud_url = upload_file(output_filename)
+        os.remove(output_filename)
+        logger.info(f"Job {job_id}: Slideshow uploaded to cloud storage: {cloud_url}")
+
+        return cloud_url, "/v1/image/transform/slideshow", 200
+
+    except ValueError as e:
+        logger.error(f"Job {job_id}: Invalid slideshow request - {str(e)}")
+        return str(e), "/v1/image/transform/slideshow", 400
+    except Exception as e:
+        logger.error(f"Job {job_id}: Error rendering slideshow - {str(e)}", exc_info=True)
+        return str(e), "/v1/image/transform/slideshow", 500
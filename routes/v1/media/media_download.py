@@ -4,26 +4,19 @@ import logging
 import os
 import base64
 import yt_dlp
-import subprocess  # For ffprobe
 from services.authentication import authenticate
 from services.cloud_storage import upload_file
+from services.ffprobe import get_duration as probe_duration
 
 v1_media_download_bp = Blueprint('v1_media_download', __name__)
 logger = logging.getLogger(__name__)
 
 def get_duration(file_path):
     """
-    Uses ffprobe to extract the duration of a media file.
+    Duration of a media file in seconds, or None if it cannot be probed.
     """
     try:
-        result = subprocess.run(
-            ['ffprobe', '-i', file_path, '-show_entries', 'format=duration', '-v', 'quiet', '-of', 'csv=p=0'],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        duration = float(result.stdout.strip())
-        return duration
+        return probe_duration(file_path)
     except Exception as e:
         logger.error(f"Error getting duration for file {file_path}: {e}")
         return None
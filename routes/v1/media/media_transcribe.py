@@ -20,9 +20,11 @@ logger = logging.getLogger(__name__)
         "include_text": {"type": "boolean"},
         "include_srt": {"type": "boolean"},
         "include_segments": {"type": "boolean"},
+        "segments_format": {"type": "string", "enum": ["full", "compact", "binary"]},
         "word_timestamps": {"type": "boolean"},
         "response_type": {"type": "string", "enum": ["direct", "cloud"]},
         "language": {"type": "string"},
+        "vad": {"type": "boolean"},
         "webhook_url": {"type": "string", "format": "uri"},
         "id": {"type": "string"}
     },
@@ -36,14 +38,19 @@ def transcribe(job_id, data):
     include_text = data.get('include_text', True)
     include_srt = data.get('include_srt', False)
     include_segments = data.get('include_segments', False)
+    segments_format = data.get('segments_format', 'full')
     word_timestamps = data.get('word_timestamps', False)
     response_type = data.get('response_type', 'direct')
     language = data.get('language', None)
+    vad = data.get('vad', False)
     webhook_url = data.get('webhook_url')
     id = data.get('id')
 
     logger.info(f"Job {job_id}: Received transcription request for {media_url}")
 
+    if segments_format == 'binary' and response_type != 'cloud':
+        return "segments_format 'binary' requires response_type 'cloud'", "/v1/media/transcribe", 400
+
     temp_file_path = f"/tmp/{job_id}"  # Use %(ext)s so yt-dlp can insert the correct extension
     try:
         # Step 1: Download media using yt-dlp
@@ -55,7 +62,10 @@ def transcribe(job_id, data):
                 'key': 'FFmpegExtractAudio',
                 'preferredcodec': 'flac',  # or 'wav', 'm4a', 'mp3', etc.
                 'preferredquality': '0'    # '0' for lossless FLAC
-            }]
+            }],
+            # Store the 16 kHz mono 16-bit PCM Whisper decodes to, so the FLAC decodes to the
+            # same samples as the original and shares transcription cache entries with it
+            'postprocessor_args': {'extractaudio': ['-ac', '1', '-ar', '16000', '-sample_fmt', 's16']}
         }
 
         logger.info(f"Job {job_id}: Downloading best audio from {media_url} as FLAC")
@@ -71,7 +81,7 @@ def transcribe(job_id, data):
 
         # Step 3: Process transcription
         logger.info(f"Job {job_id}: Starting transcription for {temp_file_path}.flac")
-        result = process_transcribe_media(f"{temp_file_path}.flac", task, include_text, include_srt, include_segments, word_timestamps, response_type, language, job_id)
+        result = process_transcribe_media(f"{temp_file_path}.flac", task, include_text, include_srt, include_segments, word_timestamps, response_type, language, job_id, vad, segments_format)
 
         # Step 4: Handle response
         logger.info(f"Job {job_id}: Transcription process completed successfully")
@@ -82,6 +92,8 @@ def transcribe(job_id, data):
                 "srt": result[1],
                 "segments": result[2]
             }
+            if vad:
+                result_json["vad"] = result[3]
             return result_json, "/v1/media/transcribe", 200
 
         else:  # response_type == "cloud"
@@ -90,6 +102,8 @@ def transcribe(job_id, data):
                 "srt": upload_file(result[1]) if include_srt else None,
                 "segments": upload_file(result[2]) if include_segments else None,
             }
+            if vad:
+                cloud_urls["vad"] = result[3]
 
             # Clean up transcription result files
             if include_text and result[0]:
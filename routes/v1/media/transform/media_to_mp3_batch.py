@@ -0,0 +1,63 @@
+from flask import Blueprint
+from app_utils import validate_payload, queue_task_wrapper
+import logging
+from services.v1.media.transform.media_to_mp3_batch import process_media_to_mp3_batch
+from services.authentication import authenticate
+from services.webhook import send_webhook
+
+v1_media_transform_mp3_batch_bp = Blueprint('v1_media_transform_mp3_batch', __name__)
+logger = logging.getLogger(__name__)
+
+@v1_media_transform_mp3_batch_bp.route('/v1/media/transform/mp3/batch', methods=['POST'])
+@authenticate
+@validate_payload({
+    "type": "object",
+    "properties": {
+        "media": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "media_url": {"type": "string", "format": "uri"},
+                    "id": {"type": "string"}
+                },
+                "required": ["media_url"],
+                "additionalProperties": False
+            },
+            "minItems": 1,
+            "maxItems": 100
+        },
+        "bitrate": {"type": "string", "pattern": "^[0-9]+k$"},
+        "webhook_url": {"type": "string", "format": "uri"},
+        "id": {"type": "string"}
+    },
+    "required": ["media"],
+    "additionalProperties": False
+})
+@queue_task_wrapper(bypass_queue=False)
+def convert_media_to_mp3_batch(job_id, data):
+    media = data['media']
+    webhook_url = data.get('webhook_url')
+
+    logger.info(f"Job {job_id}: Received media-to-mp3 batch request for {len(media)} items")
+
+    def report(index, result):
+        # Per-item progress; the final webhook carries all results
+        if webhook_url:
+            send_webhook(webhook_url, {
+                "endpoint": "/v1/media/transform/mp3/batch",
+                "job_id": job_id,
+                "id": data.get('id'),
+                "index": index,
+                "total": len(media),
+                "result": result
+            })
+
+    try:
+        results = process_media_to_mp3_batch(media, job_id, data.get('bitrate', '128k'), on_result=report)
+        logger.info(f"Job {job_id}: Media-to-mp3 batch completed")
+        return {"results": results}, "/v1/media/transform/mp3/batch", 200
+
+    except Exception as e:
+        logger.error(f"Job {job_id}: Error during media-to-mp3 batch - {str(e)}", exc_info=True)
+        return {"error": str(e)}, "/v1/media/transform/mp3/batch", 500
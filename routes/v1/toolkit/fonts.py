@@ -0,0 +1,19 @@
+import logging
+from flask import Blueprint
+from services.authentication import authenticate
+from services.font_index import get_font_index
+from app_utils import queue_task_wrapper
+
+v1_toolkit_fonts_bp = Blueprint('v1_toolkit_fonts', __name__)
+logger = logging.getLogger(__name__)
+
+@v1_toolkit_fonts_bp.route('/v1/toolkit/fonts', methods=['GET'])
+@authenticate
+@queue_task_wrapper(bypass_queue=True)
+def list_fonts(job_id, data):
+    try:
+        families = get_font_index()['families']
+        return {"fonts": families}, "/v1/toolkit/fonts", 200
+    except Exception as e:
+        logger.error(f"Job {job_id}: Error listing fonts - {str(e)}")
+        return str(e), "/v1/toolkit/fonts", 500
@@ -0,0 +1,27 @@
+import logging
+from flask import Blueprint
+from services.authentication import authenticate
+from services.job_status import get_job_status
+from app_utils import validate_payload, queue_task_wrapper
+
+v1_toolkit_job_status_bp = Blueprint('v1_toolkit_job_status', __name__)
+logger = logging.getLogger(__name__)
+
+@v1_toolkit_job_status_bp.route('/v1/toolkit/job/status', methods=['POST'])
+@authenticate
+@validate_payload({
+    "type": "object",
+    "properties": {
+        "job_id": {"type": "string"}
+    },
+    "required": ["job_id"],
+    "additionalProperties": False
+})
+@queue_task_wrapper(bypass_queue=True)
+def job_status(job_id, data):
+    # Statuses are files under JOB_STATUS_DIR, shared by every worker of this instance
+    status = get_job_status(data['job_id'])
+    if status is None:
+        return f"Job {data['job_id']} not found on this instance", "/v1/toolkit/job/status", 404
+    status.pop('webhook_url', None)
+    return status, "/v1/toolkit/job/status", 200
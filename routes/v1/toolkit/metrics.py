@@ -0,0 +1,18 @@
+import logging
+from flask import Blueprint
+from services.authentication import authenticate
+from services.ffmpeg_runner import get_ffmpeg_metrics
+from app_utils import queue_task_wrapper
+
+v1_toolkit_metrics_bp = Blueprint('v1_toolkit_metrics', __name__)
+logger = logging.getLogger(__name__)
+
+@v1_toolkit_metrics_bp.route('/v1/toolkit/metrics', methods=['GET'])
+@authenticate
+@queue_task_wrapper(bypass_queue=True)
+def metrics(job_id, data):
+    try:
+        return {"ffmpeg": get_ffmpeg_metrics()}, "/v1/toolkit/metrics", 200
+    except Exception as e:
+        logger.error(f"Job {job_id}: Error collecting metrics - {str(e)}")
+        return str(e), "/v1/toolkit/metrics", 500
@@ -0,0 +1,91 @@
+from flask import Blueprint
+from app_utils import validate_payload, queue_task_wrapper
+import logging
+from services.v1.video.caption_batch import process_caption_batch
+from services.authentication import authenticate
+from services.webhook import send_webhook
+from routes.v1.video.caption_video import CAPTION_SETTINGS_SCHEMA, REPLACE_SCHEMA
+from services.encoding_profiles import PROFILE_SCHEMA
+
+v1_video_caption_batch_bp = Blueprint('v1_video/caption_batch', __name__)
+logger = logging.getLogger(__name__)
+
+@v1_video_caption_batch_bp.route('/v1/video/caption/batch', methods=['POST'])
+@authenticate
+@validate_payload({
+    "type": "object",
+    "properties": {
+        "videos": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "video_url": {"type": "string", "format": "uri"},
+                    "captions": {"type": "string"},
+                    "id": {"type": "string"}
+                },
+                "required": ["video_url"],
+                "additionalProperties": False
+            },
+            "minItems": 1,
+            "maxItems": 100
+        },
+        "settings": CAPTION_SETTINGS_SCHEMA,
+        "replace": REPLACE_SCHEMA,
+        "render": {
+            "type": "string",
+            "enum": ["burn", "soft"]
+        },
+        "output_format": {
+            "type": "string",
+            "enum": ["mp4", "mkv"]
+        },
+        "profile": PROFILE_SCHEMA,
+        "webhook_url": {"type": "string", "format": "uri"},
+        "id": {"type": "string"},
+        "language": {"type": "string"}
+    },
+    "required": ["videos"],
+    "additionalProperties": False
+})
+@queue_task_wrapper(bypass_queue=False)
+def caption_video_batch_v1(job_id, data):
+    videos = data['videos']
+    webhook_url = data.get('webhook_url')
+
+    logger.info(f"Job {job_id}: Received batch captioning request for {len(videos)} videos")
+
+    def report(index, result):
+        # Per-video progress; the final webhook carries all results
+        if webhook_url:
+            send_webhook(webhook_url, {
+                "endpoint": "/v1/video/caption/batch",
+                "job_id": job_id,
+                "id": data.get('id'),
+                "index": index,
+                "total": len(videos),
+                "result": result
+            })
+
+    try:
+        results = process_caption_batch(
+            videos,
+            data.get('settings', {}),
+            data.get('replace', []),
+            job_id,
+            language=data.get('language', 'auto'),
+            render=data.get('render', 'burn'),
+            output_format=data.get('output_format', 'mp4'),
+            on_result=report,
+            profile=data.get('profile')
+        )
+
+        if isinstance(results, dict) and 'error' in results:
+            return results, "/v1/video/caption/batch", 400
+
+        logger.info(f"Job {job_id}: Batch captioning completed")
+        return {"results": results}, "/v1/video/caption/batch", 200
+
+    except Exception as e:
+        logger.error(f"Job {job_id}: Error during batch captioning - {str(e)}", exc_info=True)
+        return {"error": str(e)}, "/v1/video/caption/batch", 500
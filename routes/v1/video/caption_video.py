@@ -2,6 +2,7 @@ from flask import Blueprint, jsonify
 from app_utils import validate_payload, queue_task_wrapper
 import logging
 from services.v1.video.caption_video import process_captioning_v1
+from services.encoding_profiles import PROFILE_SCHEMA
 from services.authentication import authenticate
 from services.cloud_storage import upload_file
 import os
@@ -10,6 +11,62 @@ import requests  # Ensure requests is imported for webhook handling
 v1_video_caption_bp = Blueprint('v1_video/caption', __name__)
 logger = logging.getLogger(__name__)
 
+CAPTION_SETTINGS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "line_color": {"type": "string"},
+        "word_color": {"type": "string"},
+        "outline_color": {"type": "string"},
+        "all_caps": {"type": "boolean"},
+        "max_words_per_line": {"type": "integer"},
+        "x": {"type": "integer"},
+        "y": {"type": "integer"},
+        "position": {
+            "type": "string",
+            "enum": [
+                "bottom_left", "bottom_center", "bottom_right",
+                "middle_left", "middle_center", "middle_right",
+                "top_left", "top_center", "top_right"
+            ]
+        },
+        "alignment": {
+            "type": "string",
+            "enum": ["left", "center", "right"]
+        },
+        "font_family": {"type": "string"},
+        "font_size": {"type": "integer"},
+        "bold": {"type": "boolean"},
+        "italic": {"type": "boolean"},
+        "underline": {"type": "boolean"},
+        "strikeout": {"type": "boolean"},
+        "style": {
+            "type": "string",
+            "enum": ["classic", "karaoke", "highlight", "underline", "word_by_word"]
+        },
+        "event_mode": {
+            "type": "string",
+            "enum": ["per_word", "per_line"]
+        },
+        "outline_width": {"type": "integer"},
+        "spacing": {"type": "integer"},
+        "angle": {"type": "integer"},
+        "shadow_offset": {"type": "integer"}
+    },
+    "additionalProperties": False
+}
+
+REPLACE_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "find": {"type": "string"},
+            "replace": {"type": "string"}
+        },
+        "required": ["find", "replace"]
+    }
+}
+
 @v1_video_caption_bp.route('/v1/video/caption', methods=['POST'])
 @authenticate
 @validate_payload({
@@ -17,56 +74,32 @@ logger = logging.getLogger(__name__)
     "properties": {
         "video_url": {"type": "string", "format": "uri"},
         "captions": {"type": "string"},
-        "settings": {
+        "settings": CAPTION_SETTINGS_SCHEMA,
+        "replace": REPLACE_SCHEMA,
+        "render": {
+            "type": "string",
+            "enum": ["burn", "soft"]
+        },
+        "output_format": {
+            "type": "string",
+            "enum": ["mp4", "mkv"]
+        },
+        "profile": PROFILE_SCHEMA,
+        "parallel_segments": {"type": "integer", "minimum": 1, "maximum": 32},
+        "preview": {
             "type": "object",
             "properties": {
-                "line_color": {"type": "string"},
-                "word_color": {"type": "string"},
-                "outline_color": {"type": "string"},
-                "all_caps": {"type": "boolean"},
-                "max_words_per_line": {"type": "integer"},
-                "x": {"type": "integer"},
-                "y": {"type": "integer"},
-                "position": {
-                    "type": "string",
-                    "enum": [
-                        "bottom_left", "bottom_center", "bottom_right",
-                        "middle_left", "middle_center", "middle_right",
-                        "top_left", "top_center", "top_right"
-                    ]
-                },
-                "alignment": {
-                    "type": "string",
-                    "enum": ["left", "center", "right"]
-                },
-                "font_family": {"type": "string"},
-                "font_size": {"type": "integer"},
-                "bold": {"type": "boolean"},
-                "italic": {"type": "boolean"},
-                "underline": {"type": "boolean"},
-                "strikeout": {"type": "boolean"},
-                "style": {
-                    "type": "string",
-                    "enum": ["classic", "karaoke", "highlight", "underline", "word_by_word"]
-                },
-                "outline_width": {"type": "integer"},
-                "spacing": {"type": "integer"},
-                "angle": {"type": "integer"},
-                "shadow_offset": {"type": "integer"}
+                "start": {"type": "number", "minimum": 0},
+                "duration": {"type": "number", "exclusiveMinimum": 0, "maximum": 60},
+                "timestamps": {
+                    "type": "array",
+                    "items": {"type": "number", "minimum": 0},
+                    "minItems": 1,
+                    "maxItems": 20
+                }
             },
             "additionalProperties": False
         },
-        "replace": {
-            "type": "array",
-            "items": {
-                "type": "object",
-                "properties": {
-                    "find": {"type": "string"},
-                    "replace": {"type": "string"}
-                },
-                "required": ["find", "replace"]
-            }
-        },
         "webhook_url": {"type": "string", "format": "uri"},
         "id": {"type": "string"},
         "language": {"type": "string"}
@@ -83,6 +116,11 @@ def caption_video_v1(job_id, data):
     webhook_url = data.get('webhook_url')
     id = data.get('id')
     language = data.get('language', 'auto')
+    render = data.get('render', 'burn')
+    output_format = data.get('output_format', 'mp4')
+    parallel_segments = data.get('parallel_segments', 1)
+    preview = data.get('preview')
+    profile = data.get('profile')
 
     logger.info(f"Job {job_id}: Received v1 captioning request for {video_url}")
     logger.info(f"Job {job_id}: Settings received: {settings}")
@@ -94,7 +132,7 @@ def caption_video_v1(job_id, data):
         # This ensures position and alignment remain independent keys.
         
         # Process video with the enhanced v1 service
-        output = process_captioning_v1(video_url, captions, settings, replace, job_id, language)
+        output = process_captioning_v1(video_url, captions, settings, replace, job_id, language, render, output_format, parallel_segments, preview, profile)
         
         if isinstance(output, dict) and 'error' in output:
             # Check if this is a font-related error by checking for 'available_fonts' key
@@ -105,6 +143,15 @@ def caption_video_v1(job_id, data):
                 # Non-font error scenario, do not return available_fonts
                 return {"error": output['error']}, "/v1/video/caption", 400
 
+        if isinstance(output, list):
+            # Preview frames: upload each still
+            frames = []
+            for timestamp, frame_path in zip(preview['timestamps'], output):
+                frames.append({"timestamp": timestamp, "url": upload_file(frame_path)})
+                os.remove(frame_path)
+            logger.info(f"Job {job_id}: Uploaded {len(frames)} preview frames")
+            return frames, "/v1/video/caption", 200
+
         # If processing was successful, output is the file path
         output_path = output
         logger.info(f"Job {job_id}: Captioning process completed successfully")
@@ -24,6 +24,7 @@ logger = logging.getLogger(__name__)
             },
             "minItems": 1
         },
+        "staging": {"type": "string", "enum": ["download", "remote", "window"]},
         "webhook_url": {"type": "string", "format": "uri"},
         "id": {"type": "string"}
     },
@@ -39,7 +40,7 @@ def combine_videos(job_id, data):
     logger.info(f"Job {job_id}: Received combine-videos request for {len(media_urls)} videos")
 
     try:
-        output_file = process_video_concatenate(media_urls, job_id)
+        output_file = process_video_concatenate(media_urls, job_id, staging=data.get('staging', 'download'))
         logger.info(f"Job {job_id}: Video combination process completed successfully")
 
         cloud_url = upload_file(output_file)
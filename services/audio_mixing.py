@@ -1,66 +1,153 @@
 import os
+import logging
 import subprocess
 from services.file_management import download_file
+from services.ffprobe import get_duration, has_audio
+from services.ffmpeg_runner import run_ffmpeg
+from services.encoding_profiles import video_args, audio_args, container_args
 
 STORAGE_PATH = "/tmp/"
+logger = logging.getLogger(__name__)
+
+DEFAULT_DUCKING = {'threshold': 0.05, 'ratio': 8, 'attack': 20, 'release': 300}
+
+def track_filter(track, duration, output_duration):
+    """
+    Filter chain for one track: volume, fades, then the offset. The track is cut at
+    the end of the output, so looped tracks are finite and fade out with the output.
+    Returns None when the track starts after the output ends.
+    """
+    offset = track.get('offset', 0)
+    length = output_duration - offset
+    if length <= 0:
+        return None
+    if not track.get('loop') and duration:
+        length = min(length, duration)
+
+    chain = [f"atrim=end={length:.6f}", f"volume={track.get('volume', 100) / 100}"]
+    if track.get('fade_in'):
+        chain.append(f"afade=t=in:st=0:d={track['fade_in']}")
+    if track.get('fade_out'):
+        chain.append(f"afade=t=out:st={max(0.0, length - track['fade_out']):.6f}:d={track['fade_out']}")
+    if offset:
+        chain.append(f"adelay=delays={int(offset * 1000)}:all=1")
+    return ",".join(chain)
+
+def build_mix_graph(tracks, durations, output_duration, video_volume=None, ducking=None):
+    """
+    One filter_complex mixing every track; input 0 is the video and track i is input
+    i + 1. With video_volume the video's own audio joins the mix. Tracks marked 'duck'
+    are compressed by a sidechain keyed on the sum of the other tracks, e.g. music
+    under a voice-over. Returns (filter_complex, output label).
+    """
+    chains = []
+    foreground, ducked = [], []
+    if video_volume is not None:
+        chains.append(f"[0:a]atrim=end={output_duration:.6f},volume={video_volume / 100}[video_audio]")
+        foreground.append("[video_audio]")
+
+    for index, (track, duration) in enumerate(zip(tracks, durations)):
+        chain = track_filter(track, duration, output_duration)
+        if chain is None:
+            continue
+        chains.append(f"[{index + 1}:a]{chain}[track{index}]")
+        (ducked if track.get('duck') else foreground).append(f"[track{index}]")
+
+    def mix(labels, output_label):
+        if len(labels) == 1:
+            chains.append(f"{labels[0]}anull{output_label}")
+        else:
+            # normalize=0 keeps each track at its own volume instead of dividing by the input count
+            chains.append(f"{''.join(labels)}amix=inputs={len(labels)}:duration=longest:normalize=0{output_label}")
+
+    if not foreground and not ducked:
+        raise ValueError("No audio track overlaps the output")
+    if ducked and foreground:
+        settings = {**DEFAULT_DUCKING, **(ducking or {})}
+        mix(foreground, "[foreground]")
+        mix(ducked, "[bed]")
+        # The key is padded with silence so the bed keeps playing after the foreground ends
+        chains.append("[foreground]asplit=2[foreground_mix][key_source]")
+        chains.append("[key_source]apad[key]")
+        chains.append(
+            f"[bed][key]sidechaincompress=threshold={settings['threshold']}:ratio={settings['ratio']}"
+            f":attack={settings['attack']}:release={settings['release']}[ducked]"
+        )
+        mix(["[foreground_mix]", "[ducked]"], "[mix]")
+    else:
+        # Nothing to duck under: ducked tracks are mixed like the others
+        mix(foreground + ducked, "[mix]")
+
+    # Silence after the last track so the audio spans the whole output
+    chains.append("[mix]apad[audio_out]")
+    return ";".join(chains), "[audio_out]"
+
+def process_audio_mixing(video_url, audio_url, video_vol, audio_vol, output_length, job_id, webhook_url=None,
+                         tracks=None, ducking=None, keep_video_audio=False, profile=None):
+    """
+    Put a mix of audio tracks on a video. Without `tracks`, audio_url is the single
+    track at audio_vol. The video is stream-copied; when the audio is longer it is
+    looped with -stream_loop, and re-encoded with the encoding profile only if the
+    container cannot be copied that way. The mix is encoded with the profile's audio settings.
+    """
+    if not tracks:
+        tracks = [{'audio_url': audio_url, 'volume': audio_vol}]
 
-def get_duration(file_path):
-    cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', file_path]
-    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    return float(result.stdout)
-
-def process_audio_mixing(video_url, audio_url, video_vol, audio_vol, output_length, job_id, webhook_url=None):
     video_path = download_file(video_url, STORAGE_PATH)
-    audio_path = download_file(audio_url, STORAGE_PATH)
+    staged = {}
     output_path = os.path.join(STORAGE_PATH, f"{job_id}.mp4")
 
-    video_duration = get_duration(video_path)
-    audio_duration = get_duration(audio_path)
-
-    # Explicitly set output duration based on output_length
-    output_duration = video_duration if output_length == 'video' else audio_duration
-
-    # Prepare FFmpeg command
-    cmd = ['ffmpeg', '-y']
-
-    # Input video
-    cmd.extend(['-i', video_path])
-
-    # Input audio
-    cmd.extend(['-i', audio_path])
-
-    # Video settings
-    if output_length == 'audio' and audio_duration > video_duration:
-        cmd.extend(['-stream_loop', '-1'])  # Loop video only if output_length is 'audio' and audio is longer
-
-    # Audio settings
-    audio_filter = f'[1:a]volume={audio_vol/100}'
-    if output_length == 'video':
-        audio_filter += f',atrim=duration={video_duration}'
-    audio_filter += '[a]'
-    cmd.extend(['-filter_complex', audio_filter])
-
-    # Output settings
-    cmd.extend(['-map', '0:v'])  # Map video from first input
-    cmd.extend(['-map', '[a]'])  # Map processed audio
-
-    if output_length == 'audio' and audio_duration > video_duration:
-        cmd.extend(['-c:v', 'libx264'])  # Re-encode video if looping
-    else:
-        cmd.extend(['-c:v', 'copy'])  # Copy video codec otherwise
-
-    cmd.extend(['-c:a', 'aac'])  # Always encode audio to AAC
-    
-    # Explicitly set output duration
-    cmd.extend(['-t', str(output_duration)])
-
-    cmd.append(output_path)
-
-    # Run FFmpeg command
-    subprocess.run(cmd, check=True)
-
-    # Clean up input files
-    os.remove(video_path)
-    os.remove(audio_path)
-
-    return output_path
\ No newline at end of file
+    try:
+        track_paths = []
+        for track in tracks:
+            if track['audio_url'] not in staged:
+                staged[track['audio_url']] = download_file(track['audio_url'], STORAGE_PATH)
+            track_paths.append(staged[track['audio_url']])
+
+        video_duration = get_duration(video_path)
+        durations = [get_duration(path) for path in track_paths]
+        if video_duration is None:
+            raise ValueError("Could not determine the video duration")
+
+        # Explicitly set output duration based on output_length
+        if output_length == 'audio':
+            track_ends = [
+                track.get('offset', 0) + duration
+                for track, duration in zip(tracks, durations)
+                if duration and not track.get('loop')
+            ]
+            output_duration = max(track_ends) if track_ends else video_duration
+        else:
+            output_duration = video_duration
+
+        video_volume = video_vol if keep_video_audio and has_audio(video_path) else None
+        filter_complex, audio_label = build_mix_graph(tracks, durations, output_duration, video_volume, ducking)
+
+        # Input options go before the -i they apply to
+        loop_video = output_duration > video_duration
+        cmd = ['ffmpeg', '-y']
+        if loop_video:
+            cmd.extend(['-stream_loop', '-1'])
+        cmd.extend(['-i', video_path])
+        for track, track_path in zip(tracks, track_paths):
+            if track.get('loop'):
+                cmd.extend(['-stream_loop', '-1'])
+            cmd.extend(['-i', track_path])
+
+        cmd.extend(['-filter_complex', filter_complex, '-map', '0:v:0', '-map', audio_label])
+        output_args = audio_args(profile) + ['-t', f"{output_duration:.6f}"] + container_args(profile, output_path) + [output_path]
+
+        try:
+            run_ffmpeg(cmd + ['-c:v', 'copy'] + output_args, job_id=job_id, duration=output_duration)
+        except subprocess.CalledProcessError as e:
+            if not loop_video:
+                raise
+            logger.warning(f"Job {job_id}: Looping the video by stream copy failed, re-encoding: {e.stderr[-500:]}")
+            run_ffmpeg(cmd + video_args(profile) + output_args, job_id=job_id, duration=output_duration)
+
+        return output_path
+    finally:
+        # Clean up input files
+        for path in [video_path] + list(staged.values()):
+            if os.path.exists(path):
+                os.remove(path)
@@ -1,9 +1,11 @@
 import os
-import ffmpeg
 import logging
 import requests
 import subprocess
 from services.file_management import download_file
+from services.font_index import get_custom_font_paths
+from services.ffmpeg_runner import run_ffmpeg
+from services.encoding_profiles import video_args, container_args
 
 # Set the default local storage directory
 STORAGE_PATH = "/tmp/"
@@ -12,52 +14,6 @@ STORAGE_PATH = "/tmp/"
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Define the path to the fonts directory
-FONTS_DIR = '/usr/share/fonts/custom'
-
-# Create the FONT_PATHS dictionary by reading the fonts directory
-FONT_PATHS = {}
-for font_file in os.listdir(FONTS_DIR):
-    if font_file.endswith('.ttf') or font_file.endswith('.TTF'):
-        font_name = os.path.splitext(font_file)[0]
-        FONT_PATHS[font_name] = os.path.join(FONTS_DIR, font_file)
-# logger.info(f"Available fonts: {FONT_PATHS}")
-
-# Create a list of acceptable font names
-ACCEPTABLE_FONTS = list(FONT_PATHS.keys())
-#logger.info(f"Acceptable font names: {ACCEPTABLE_FONTS}")
-
-# Match font files with fontconfig names
-def match_fonts():
-    try:
-        result = subprocess.run(['fc-list', ':family'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        if result.returncode == 0:
-            fontconfig_fonts = result.stdout.split('\n')
-            fontconfig_fonts = list(set(fontconfig_fonts))  # Remove duplicates
-            matched_fonts = {}
-            for font_file in FONT_PATHS.keys():
-                for fontconfig_font in fontconfig_fonts:
-                    if font_file.lower() in fontconfig_font.lower():
-                        matched_fonts[font_file] = fontconfig_font.strip()
-
-            # Parse and output the matched font names
-            unique_font_names = set()
-            for font in matched_fonts.values():
-                font_name = font.split(':')[1].strip()
-                unique_font_names.add(font_name)
-            
-            # Remove duplicates from font_name and sort them alphabetically
-            unique_font_names = sorted(list(set(unique_font_names)))
-            
-            # for font_name in unique_font_names:
-            #     print(font_name)
-        else:
-            logger.error(f"Error matching fonts: {result.stderr}")
-    except Exception as e:
-        logger.error(f"Exception while matching fonts: {str(e)}")
-
-match_fonts()
-
 def generate_style_line(options):
     """Generate ASS style line from options."""
     style_options = {
@@ -86,7 +42,7 @@ def generate_style_line(options):
     }
     return f"Style: {','.join(str(v) for v in style_options.values())}"
 
-def process_captioning(file_url, caption_srt, caption_type, options, job_id):
+def process_captioning(file_url, caption_srt, caption_type, options, job_id, profile=None):
     """Process video captioning using FFmpeg."""
     try:
         logger.info(f"Job {job_id}: Starting download of file from {file_url}")
@@ -137,11 +93,12 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
 
         # Ensure font_name is converted to the full font path
         font_name = options.get('font_name', 'Arial')
-        if font_name in FONT_PATHS:
-            selected_font = FONT_PATHS[font_name]
+        font_paths = get_custom_font_paths()
+        if font_name in font_paths:
+            selected_font = font_paths[font_name]
             logger.info(f"Job {job_id}: Font path set to {selected_font}")
         else:
-            selected_font = FONT_PATHS.get('Arial')
+            selected_font = font_paths.get('Arial')
             logger.warning(f"Job {job_id}: Font {font_name} not found. Using default font Arial.")
 
         # For ASS subtitles, we should avoid overriding styles
@@ -187,19 +144,19 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             logger.info(f"Job {job_id}: Running FFmpeg with filter: {subtitle_filter}")
 
             # Run FFmpeg to add subtitles to the video
-            ffmpeg.input(video_path).output(
-                output_path,
-                vf=subtitle_filter,
-                acodec='copy'
-            ).run()
+            command = [
+                'ffmpeg', '-i', video_path,
+                '-vf', subtitle_filter,
+                *video_args(profile),
+                '-c:a', 'copy',
+                *container_args(profile, output_path),
+                output_path
+            ]
+            run_ffmpeg(command, job_id=job_id)
             logger.info(f"Job {job_id}: FFmpeg processing completed, output file at {output_path}")
-        except ffmpeg.Error as e:
+        except subprocess.CalledProcessError as e:
             # Log the FFmpeg stderr output
-            if e.stderr:
-                error_message = e.stderr.decode('utf8')
-            else:
-                error_message = 'Unknown FFmpeg error'
-            logger.error(f"Job {job_id}: FFmpeg error: {error_message}")
+            logger.error(f"Job {job_id}: FFmpeg error: {e.stderr or 'Unknown FFmpeg error'}")
             raise
 
         # The upload process will be handled by the calling function
@@ -1,35 +1,57 @@
 import os
-import subprocess
-import json
+import shutil
 from services.file_management import download_file
+from services.ffmpeg_runner import run_ffmpeg
 
 STORAGE_PATH = "/tmp/"
 
-def process_keyframe_extraction(video_url, job_id):
+def keyframe_dir(job_id):
+    return os.path.join(STORAGE_PATH, f"{job_id}_keyframes")
+
+def quality_args(image_format, quality):
+    """Map a 1-100 quality to the encoder's own scale (mjpeg qscale runs 31..2, worst to best)."""
+    if quality is None:
+        return []
+    if image_format == 'webp':
+        return ['-quality', str(quality)]
+    return ['-q:v', str(round(31 - (quality - 1) * 29 / 99))]
+
+def process_keyframe_extraction(video_url, job_id, max_frames=None, width=None, image_format='jpg', quality=None):
+    """
+    Write the video's keyframes as images into a directory of their own and return
+    their paths in order. Only keyframes are decoded (-skip_frame nokey), so the cost
+    follows the number of keyframes rather than the length of the video.
+    """
     video_path = download_file(video_url, STORAGE_PATH)
-
-    # Extract keyframes
-    output_pattern = os.path.join(STORAGE_PATH, f"{job_id}_%03d.jpg")
-    cmd = [
-        'ffmpeg',
-        '-i', video_path,
-        '-vf', f"select='eq(pict_type,I)',scale=iw*sar:ih,setsar=1",
-        '-vsync', 'vfr',
-        output_pattern
-    ]
-
-    print(f"Images: {cmd}")
-
-    subprocess.run(cmd, check=True)
-
-    # Upload keyframes to GCS and get URLs
-    output_filenames = []
-    for filename in sorted(os.listdir(STORAGE_PATH)):
-        if filename.startswith(f"{job_id}_") and filename.endswith(".jpg"):
-            file_path = os.path.join(STORAGE_PATH, filename)
-            output_filenames.append(file_path)
-
-    # Clean up input file
-    os.remove(video_path)
-
-    return output_filenames
\ No newline at end of file
+    output_dir = keyframe_dir(job_id)
+    os.makedirs(output_dir, exist_ok=True)
+
+    try:
+        # Extract keyframes
+        video_filter = "scale=iw*sar:ih,setsar=1"
+        if width:
+            video_filter += f",scale={width}:-2"
+        output_pattern = os.path.join(output_dir, f"%04d.{image_format}")
+        cmd = [
+            'ffmpeg',
+            '-skip_frame', 'nokey',
+            '-i', video_path,
+            '-vf', video_filter,
+            '-vsync', 'vfr'
+        ]
+        if max_frames:
+            cmd.extend(['-frames:v', str(max_frames)])
+        cmd.extend(quality_args(image_format, quality))
+        cmd.append(output_pattern)
+
+        print(f"Images: {cmd}")
+
+        run_ffmpeg(cmd, job_id=job_id)
+    finally:
+        # Clean up input file
+        os.remove(video_path)
+
+    return [os.path.join(output_dir, filename) for filename in sorted(os.listdir(output_dir))]
+
+def remove_keyframes(job_id):
+    shutil.rmtree(keyframe_dir(job_id), ignore_errors=True)
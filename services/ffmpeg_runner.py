@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import logging
+import threading
+import subprocess
+from collections import deque
+from services.job_status import update_job_progress, get_job_webhook
+from services.webhook import send_webhook
+
+logger = logging.getLogger(__name__)
+
+# Seconds between progress webhooks for queued jobs with a webhook_url; 0 disables them
+FFMPEG_PROGRESS_WEBHOOK_INTERVAL = float(os.environ.get('FFMPEG_PROGRESS_WEBHOOK_INTERVAL', 0))
+# Encodes running slower than this multiple of real time are logged as slow
+FFMPEG_SLOW_SPEED = float(os.environ.get('FFMPEG_SLOW_SPEED', 0.5))
+
+# Lines of ffmpeg's stderr kept for error messages
+STDERR_TAIL_LINES = 200
+
+# Each worker process keeps its counters in its own file here; the metrics endpoint
+# adds up the files of all workers, whichever of them serves the request
+FFMPEG_METRICS_DIR = os.environ.get('FFMPEG_METRICS_DIR', '/tmp/ffmpeg_metrics')
+
+_METRIC_NAMES = ('runs', 'failures', 'running', 'slow_runs', 'wall_time', 'media_time', 'max_wall_time')
+
+_metrics_lock = threading.Lock()
+_metrics = None
+
+def _metrics_path(pid):
+    return os.path.join(FFMPEG_METRICS_DIR, f"{pid}.json")
+
+def _read_metrics(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Unreadable ffmpeg metrics file {path}: {e}")
+        return None
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _update_metrics(update):
+    """Apply `update` to this process's counters and publish them. Called with _metrics_lock held."""
+    global _metrics
+    if _metrics is None:
+        # A reused pid carries on from the file an earlier worker left behind
+        _metrics = dict.fromkeys(_METRIC_NAMES, 0)
+        _metrics.update(_read_metrics(_metrics_path(os.getpid())) or {})
+        _metrics['running'] = 0
+    update(_metrics)
+    path = _metrics_path(os.getpid())
+    try:
+        os.makedirs(FFMPEG_METRICS_DIR, exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(_metrics, f)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.warning(f"Failed to record ffmpeg metrics: {e}")
+
+def parse_progress(fields, duration=None):
+    """Turn one block of `-progress` key=value pairs into a progress snapshot."""
+    out_time_us = fields.get('out_time_us') or fields.get('out_time_ms')  # both are microseconds
+    try:
+        out_time = max(int(out_time_us) / 1000000, 0.0)
+    except (TypeError, ValueError):
+        out_time = None
+
+    def number(value, suffix=''):
+        try:
+            return float(str(value).strip().rstrip(suffix))
+        except (TypeError, ValueError):
+            return None
+
+    progress = {
+        'frame': int(number(fields.get('frame')) or 0),
+        'fps': number(fields.get('fps')),
+        'out_time': round(out_time, 3) if out_time is not None else None,
+        'speed': number(fields.get('speed'), 'x'),
+        'bitrate_kbps': number(fields.get('bitrate'), 'kbits/s'),
+        'total_size': int(number(fields.get('total_size')) or 0),
+        'finished': fields.get('progress') == 'end'
+    }
+    if duration and out_time is not None:
+        progress['percent'] = round(min(out_time / duration * 100, 100.0), 1)
+    return progress
+
+def _record_run(wall_time, progress, failed):
+    def update(metrics):
+        metrics['runs'] += 1
+        metrics['failures'] += 1 if failed else 0
+        metrics['running'] -= 1
+        metrics['wall_time'] += wall_time
+        metrics['max_wall_time'] = max(metrics['max_wall_time'], wall_time)
+        if progress and progress.get('out_time'):
+            metrics['media_time'] += progress['out_time']
+            if wall_time > 1 and progress['out_time'] / wall_time < FFMPEG_SLOW_SPEED:
+                metrics['slow_runs'] += 1
+
+    with _metrics_lock:
+        _update_metrics(update)
+
+def _start_run(metrics):
+    metrics['running'] += 1
+
+def get_ffmpeg_metrics():
+    """Counters of all worker processes of this instance, added up."""
+    metrics = dict.fromkeys(_METRIC_NAMES, 0)
+    metrics['workers'] = 0
+    try:
+        filenames = os.listdir(FFMPEG_METRICS_DIR)
+    except FileNotFoundError:
+        filenames = []
+    for filename in filenames:
+        pid, extension = os.path.splitext(filename)
+        if extension != '.json' or not pid.isdigit():
+            continue
+        worker = _read_metrics(os.path.join(FFMPEG_METRICS_DIR, filename))
+        if not worker:
+            continue
+        for name in ('runs', 'failures', 'slow_runs', 'wall_time', 'media_time'):
+            metrics[name] += worker.get(name, 0)
+        metrics['max_wall_time'] = max(metrics['max_wall_time'], worker.get('max_wall_time', 0))
+        # Runs of a worker that died mid-encode are not running any more
+        if _process_alive(int(pid)):
+            metrics['workers'] += 1
+            metrics['running'] += worker.get('running', 0)
+    metrics['average_speed'] = round(metrics['media_time'] / metrics['wall_time'], 3) if metrics['wall_time'] else None
+    metrics['wall_time'] = round(metrics['wall_time'], 3)
+    metrics['media_time'] = round(metrics['media_time'], 3)
+    metrics['max_wall_time'] = round(metrics['max_wall_time'], 3)
+    return metrics
+
+def run_ffmpeg(command, job_id=None, duration=None, stdin=None, pass_fds=()):
+    """
+    Run an ffmpeg command with live progress reporting.
+
+    `-progress pipe:1` is added so out_time, fps, speed and bitrate can be read while
+    the command runs; each update is stored on the job's status (and becomes a
+    percentage when the expected output `duration` is known), and queued jobs with a
+    webhook_url get a progress webhook at most every FFMPEG_PROGRESS_WEBHOOK_INTERVAL
+    seconds. Run counts and timings are kept for the metrics endpoint.
+
+    `stdin` and `pass_fds` are handed to Popen for commands reading from or writing
+    to pipes (`pipe:0`, `pipe:<fd>`); stdout is taken by the progress stream.
+
+    Behaves like subprocess.run(command, check=True, capture_output=True, text=True):
+    raises CalledProcessError with ffmpeg's stderr on failure.
+    """
+    full_command = [command[0], '-progress', 'pipe:1', '-nostats'] + list(command[1:])
+    webhook_url = get_job_webhook(job_id) if job_id and FFMPEG_PROGRESS_WEBHOOK_INTERVAL > 0 else None
+
+    with _metrics_lock:
+        _update_metrics(_start_run)
+    start_time = time.time()
+    last_webhook = 0.0
+    progress = None
+    stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+    failed = True
+
+    try:
+        process = subprocess.Popen(
+            full_command, stdin=subprocess.DEVNULL if stdin is None else stdin,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, pass_fds=pass_fds,
+            text=True, bufsize=1
+        )
+        # Drain stderr concurrently so a chatty ffmpeg never blocks on a full pipe
+        stderr_thread = threading.Thread(target=lambda: stderr_tail.extend(process.stderr), daemon=True)
+        stderr_thread.start()
+
+        fields = {}
+        for line in process.stdout:
+            key, _, value = line.strip().partition('=')
+            fields[key] = value
+            if key != 'progress':
+                continue
+
+            progress = parse_progress(fields, duration)
+            fields = {}
+            if job_id:
+                update_job_progress(job_id, progress)
+            if webhook_url and (progress['finished'] or time.time() - last_webhook >= FFMPEG_PROGRESS_WEBHOOK_INTERVAL):
+                last_webhook = time.time()
+                send_webhook(webhook_url, {"job_id": job_id, "message": "processing", "progress": progress})
+
+        returncode = process.wait()
+        stderr_thread.join()
+        stderr = ''.join(stderr_tail)
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, full_command, output='', stderr=stderr)
+        failed = False
+    finally:
+        wall_time = time.time() - start_time
+        _record_run(wall_time, progress, failed)
+
+    if progress and progress.get('out_time') and wall_time > 1 and progress['out_time'] / wall_time < FFMPEG_SLOW_SPEED:
+        logger.warning(
+            f"Job {job_id}: Slow ffmpeg run, {progress['out_time']:.1f}s of media in {wall_time:.1f}s "
+            f"(speed {progress.get('speed')}x): {' '.join(map(str, command))}"
+        )
+    else:
+        logger.info(f"Job {job_id}: ffmpeg finished in {wall_time:.1f}s")
+    return subprocess.CompletedProcess(full_command, 0, stdout='', stderr=stderr)
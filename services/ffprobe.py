@@ -0,0 +1,153 @@
+import os
+import json
+import logging
+import threading
+import subprocess
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Number of parsed probe results kept in memory; 0 disables caching
+FFPROBE_CACHE_SIZE = int(os.environ.get('FFPROBE_CACHE_SIZE', 512))
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+class ProbeError(Exception):
+    """Raised when ffprobe cannot read a media file."""
+
+def _cache_key(file_path):
+    # Remote inputs (URLs) have no stat and are never cached
+    try:
+        stat = os.stat(file_path)
+    except (OSError, ValueError):
+        return None
+    return (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+
+def probe(file_path):
+    """
+    Parsed `ffprobe -show_format -show_streams` output for a file. Local files are
+    probed once and cached by path, size and mtime, so a file rewritten in place is
+    probed again. The result is shared between callers and must not be modified.
+    """
+    key = _cache_key(file_path)
+    if key is not None:
+        with _cache_lock:
+            if key in _cache:
+                _cache.move_to_end(key)
+                return _cache[key]
+
+    result = subprocess.run([
+        'ffprobe', '-v', 'error',
+        '-print_format', 'json',
+        '-show_format', '-show_streams',
+        file_path
+    ], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise ProbeError(f"ffprobe failed for {file_path}: {result.stderr.strip()}")
+
+    data = json.loads(result.stdout or '{}')
+    data.setdefault('format', {})
+    data.setdefault('streams', [])
+
+    if key is not None and FFPROBE_CACHE_SIZE > 0:
+        with _cache_lock:
+            _cache[key] = data
+            while len(_cache) > FFPROBE_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return data
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def get_streams(file_path, codec_type=None):
+    """All streams, or only those of codec_type ('video', 'audio', 'subtitle', ...)."""
+    streams = probe(file_path)['streams']
+    if codec_type is None:
+        return streams
+    return [stream for stream in streams if stream.get('codec_type') == codec_type]
+
+def find_video_stream(data):
+    """First video stream (cover art excluded) of a probe() result, or None."""
+    for stream in data['streams']:
+        if stream.get('codec_type') == 'video' and not stream.get('disposition', {}).get('attached_pic'):
+            return stream
+    return None
+
+def find_audio_stream(data):
+    """First audio stream of a probe() result, or None."""
+    for stream in data['streams']:
+        if stream.get('codec_type') == 'audio':
+            return stream
+    return None
+
+def get_video_stream(file_path):
+    """First video stream (cover art excluded), or None."""
+    return find_video_stream(probe(file_path))
+
+def get_audio_stream(file_path):
+    return find_audio_stream(probe(file_path))
+
+def has_audio(file_path):
+    return get_audio_stream(file_path) is not None
+
+def duration_of(data):
+    """Duration in seconds of a probe() result from the container, falling back to the longest stream; None if unknown."""
+    duration = _to_float(data['format'].get('duration'))
+    if duration is None:
+        durations = [_to_float(stream.get('duration')) for stream in data['streams']]
+        durations = [d for d in durations if d is not None]
+        duration = max(durations) if durations else None
+    return duration
+
+def get_duration(file_path):
+    """Duration in seconds from the container, falling back to the longest stream; None if unknown."""
+    return duration_of(probe(file_path))
+
+def get_start_time(file_path):
+    return _to_float(probe(file_path)['format'].get('start_time')) or 0.0
+
+def get_video_offset(file_path):
+    """Seconds from the start of the file to the start of the first video stream."""
+    stream = get_video_stream(file_path)
+    video_start = _to_float(stream.get('start_time')) if stream else None
+    if video_start is None:
+        return 0.0
+    return max(0.0, video_start - get_start_time(file_path))
+
+def get_bitrate(file_path):
+    """Overall bitrate in bits per second, or None if unknown."""
+    bitrate = _to_float(probe(file_path)['format'].get('bit_rate'))
+    return int(bitrate) if bitrate is not None else None
+
+def get_codecs(file_path):
+    """Codec name of the first video and audio stream, e.g. {'video': 'h264', 'audio': 'aac'}."""
+    codecs = {}
+    video_stream = get_video_stream(file_path)
+    audio_stream = get_audio_stream(file_path)
+    if video_stream:
+        codecs['video'] = video_stream.get('codec_name', 'unknown')
+    if audio_stream:
+        codecs['audio'] = audio_stream.get('codec_name', 'unknown')
+    return codecs
+
+def get_video_resolution(file_path):
+    """(width, height) of the first video stream, or None if there is none."""
+    stream = get_video_stream(file_path)
+    if not stream or 'width' not in stream or 'height' not in stream:
+        return None
+    return int(stream['width']), int(stream['height'])
+
+def get_frame_rate(file_path):
+    """Average frame rate of the first video stream, or None if unknown."""
+    stream = get_video_stream(file_path)
+    if not stream:
+        return None
+    numerator, _, denominator = stream.get('avg_frame_rate', '0/0').partition('/')
+    numerator, denominator = _to_float(numerator), _to_float(denominator or '1')
+    if not numerator or not denominator:
+        return None
+    return numerator / denominator
@@ -0,0 +1,140 @@
+import os
+import json
+import logging
+import threading
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+# Fonts bundled with the toolkit (copied here by the Dockerfile)
+FONTS_DIR = '/usr/share/fonts/custom'
+
+# Every directory fontconfig scans by default; a change in any of them invalidates the index
+FONT_ROOTS = [FONTS_DIR, '/usr/share/fonts', '/usr/local/share/fonts', os.path.expanduser('~/.fonts')]
+
+FONT_INDEX_CACHE_PATH = os.environ.get('FONT_INDEX_CACHE_PATH', '/tmp/font_index.json')
+
+FONT_EXTENSIONS = ('.ttf', '.otf', '.ttc')
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_fonts_signature():
+    """Latest mtime of any font directory; adding or removing a font file changes it."""
+    signature = 0.0
+    for root in FONT_ROOTS:
+        if not os.path.isdir(root):
+            continue
+        for dirpath, _, _ in os.walk(root):
+            try:
+                signature = max(signature, os.stat(dirpath).st_mtime)
+            except OSError:
+                continue
+    return signature
+
+def _scan_fontconfig():
+    """List installed fonts with fontconfig, the same library libass uses to resolve font names."""
+    result = subprocess.run(
+        ['fc-list', '--format', '%{file}\t%{family}\t%{style}\n'],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True
+    )
+    fonts = []
+    for line in result.stdout.splitlines():
+        parts = line.split('\t')
+        if len(parts) != 3:
+            continue
+        file_path, families, styles = parts
+        fonts.append({
+            'file': file_path,
+            # fontconfig lists localized and typographic family names separated by commas
+            'families': [family.strip() for family in families.split(',') if family.strip()],
+            'style': styles.split(',')[0].strip()
+        })
+    return fonts
+
+def _scan_matplotlib():
+    """Fallback when fontconfig is unavailable: read family names from the font files."""
+    import matplotlib.font_manager as fm
+    fonts = []
+    for font_file in fm.findSystemFonts(fontpaths=None, fontext='ttf'):
+        try:
+            font_prop = fm.FontProperties(fname=font_file)
+            fonts.append({'file': font_file, 'families': [font_prop.get_name()], 'style': font_prop.get_style()})
+        except Exception:
+            continue
+    return fonts
+
+def build_font_index():
+    signature = get_fonts_signature()
+    try:
+        fonts = _scan_fontconfig()
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.warning(f"fc-list unavailable ({e}), falling back to matplotlib font scan")
+        try:
+            fonts = _scan_matplotlib()
+        except ImportError:
+            logger.error("matplotlib not installed. Install via 'pip install matplotlib'.")
+            fonts = []
+
+    families = {}
+    for font in fonts:
+        for family in font['families']:
+            entry = families.setdefault(family, {'family': family, 'styles': [], 'files': [], 'custom': False})
+            if font['style'] and font['style'] not in entry['styles']:
+                entry['styles'].append(font['style'])
+            entry['files'].append(font['file'])
+            entry['custom'] = entry['custom'] or font['file'].startswith(FONTS_DIR + os.sep)
+
+    # Bundled fonts are also addressable by file name, as the legacy caption endpoint expects
+    custom_files = {}
+    if os.path.isdir(FONTS_DIR):
+        for font_file in sorted(os.listdir(FONTS_DIR)):
+            if font_file.lower().endswith(FONT_EXTENSIONS):
+                custom_files[os.path.splitext(font_file)[0]] = os.path.join(FONTS_DIR, font_file)
+
+    index = {
+        'signature': signature,
+        'families': [families[name] for name in sorted(families)],
+        'custom_files': custom_files
+    }
+    logger.info(f"Built font index with {len(families)} font families")
+    return index
+
+def _load_cached_index(signature):
+    try:
+        with open(FONT_INDEX_CACHE_PATH, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('signature') == signature:
+            return index
+    except (OSError, ValueError):
+        pass
+    return None
+
+def _store_cached_index(index):
+    try:
+        temp_path = f"{FONT_INDEX_CACHE_PATH}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(temp_path, FONT_INDEX_CACHE_PATH)
+    except OSError as e:
+        logger.warning(f"Failed to write font index cache {FONT_INDEX_CACHE_PATH}: {e}")
+
+def get_font_index():
+    """Return the font index, rebuilding it only when a font directory changed."""
+    global _index
+    signature = get_fonts_signature()
+    with _index_lock:
+        if _index is None or _index['signature'] != signature:
+            _index = _load_cached_index(signature)
+            if _index is None:
+                _index = build_font_index()
+                _store_cached_index(_index)
+        return _index
+
+def get_available_fonts():
+    """Font family names that can be used in ASS styles."""
+    return [entry['family'] for entry in get_font_index()['families']]
+
+def get_custom_font_paths():
+    """Map of bundled font file names (without extension) to their paths."""
+    return dict(get_font_index()['custom_files'])
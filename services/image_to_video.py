@@ -2,12 +2,14 @@ import os
 import subprocess
 import logging
 from services.file_management import download_file
+from services.ffmpeg_runner import run_ffmpeg
+from services.encoding_profiles import video_args, container_args
 from PIL import Image
 
 STORAGE_PATH = "/tmp/"
 logger = logging.getLogger(__name__)
 
-def process_image_to_video(image_url, length, frame_rate, zoom_speed, job_id, webhook_url=None):
+def process_image_to_video(image_url, length, frame_rate, zoom_speed, job_id, webhook_url=None, profile=None):
     try:
         # Download the image file
         image_path = download_file(image_url, STORAGE_PATH)
@@ -41,16 +43,17 @@ def process_image_to_video(image_url, length, frame_rate, zoom_speed, job_id, we
         cmd = [
             'ffmpeg', '-framerate', str(frame_rate), '-loop', '1', '-i', image_path,
             '-vf', f"scale={scale_dims},zoompan=z='min(1+({zoom_speed}*{length})*on/{total_frames}, {zoom_factor})':d={total_frames}:x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':s={output_dims}",
-            '-c:v', 'libx264', '-t', str(length), '-pix_fmt', 'yuv420p', output_path
+            *video_args(profile), '-t', str(length), *container_args(profile, output_path), output_path
         ]
 
         logger.info(f"Running FFmpeg command: {' '.join(cmd)}")
 
         # Run FFmpeg command
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            logger.error(f"FFmpeg command failed. Error: {result.stderr}")
-            raise subprocess.CalledProcessError(result.returncode, cmd, result.stdout, result.stderr)
+        try:
+            run_ffmpeg(cmd, job_id=job_id, duration=length)
+        except subprocess.CalledProcessError as e:
+            logger.error(f"FFmpeg command failed. Error: {e.stderr}")
+            raise
 
         logger.info(f"Video created successfully: {output_path}")
 
@@ -0,0 +1,102 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# One JSON file per job, so every worker process of the instance sees every job
+JOB_STATUS_DIR = os.environ.get('JOB_STATUS_DIR', '/tmp/job_status')
+JOB_STATUS_MAX_JOBS = int(os.environ.get('JOB_STATUS_MAX_JOBS', 1000))
+
+# Job ids are also file names; anything else is never looked up
+_JOB_ID_PATTERN = re.compile(r'^[\w-]+$')
+
+# Writers of one job live in the worker that accepted it; the lock orders its threads
+_jobs_lock = threading.Lock()
+
+def _job_path(job_id):
+    if not _JOB_ID_PATTERN.match(str(job_id)):
+        return None
+    return os.path.join(JOB_STATUS_DIR, f"{job_id}.json")
+
+def _read_job(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Unreadable job status file {path}: {e}")
+        return None
+
+def _write_job(path, job):
+    # Readers in other workers see either the previous or the new file, never a partial one
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(job, f, default=str)
+    os.replace(temp_path, path)
+
+def _evict_old_jobs():
+    """Remove the least recently updated jobs beyond JOB_STATUS_MAX_JOBS."""
+    entries = []
+    for filename in os.listdir(JOB_STATUS_DIR):
+        if not filename.endswith('.json'):
+            continue
+        path = os.path.join(JOB_STATUS_DIR, filename)
+        try:
+            entries.append((os.stat(path).st_mtime, path))
+        except FileNotFoundError:
+            continue
+    entries.sort()
+    for _, path in entries[:max(0, len(entries) - JOB_STATUS_MAX_JOBS)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def set_job_status(job_id, status, **fields):
+    """Record a job's state ('queued', 'running', 'done', 'failed') with optional extra fields."""
+    path = _job_path(job_id)
+    if path is None:
+        return
+    try:
+        with _jobs_lock:
+            os.makedirs(JOB_STATUS_DIR, exist_ok=True)
+            job = _read_job(path)
+            is_new = job is None
+            if is_new:
+                job = {'job_id': job_id, 'created_at': time.time()}
+            job.update(fields)
+            job['status'] = status
+            job['updated_at'] = time.time()
+            _write_job(path, job)
+            if is_new:
+                _evict_old_jobs()
+    except OSError as e:
+        logger.warning(f"Failed to record status of job {job_id}: {e}")
+
+def update_job_progress(job_id, progress):
+    """Attach the latest ffmpeg progress snapshot to a job that is already tracked."""
+    path = _job_path(job_id)
+    if path is None:
+        return
+    try:
+        with _jobs_lock:
+            job = _read_job(path)
+            if job is not None:
+                job['progress'] = progress
+                job['updated_at'] = time.time()
+                _write_job(path, job)
+    except OSError as e:
+        logger.warning(f"Failed to record progress of job {job_id}: {e}")
+
+def get_job_status(job_id):
+    path = _job_path(job_id)
+    return _read_job(path) if path else None
+
+def get_job_webhook(job_id):
+    job = get_job_status(job_id)
+    return job.get('webhook_url') if job else None
@@ -1,9 +1,26 @@
 import os
+import re
+import logging
 import subprocess
-import json
 from services.file_management import download_file
+from services.ffprobe import get_duration, get_bitrate, get_codecs, get_video_stream, ProbeError
+from services.ffmpeg_runner import run_ffmpeg
 
 STORAGE_PATH = "/tmp/"
+logger = logging.getLogger(__name__)
+
+# Input options for inputs read straight from HTTP(S): seek with range requests instead of
+# reading from the start, and resume after dropped connections
+STREAM_INPUT_OPTIONS = [
+    '-seekable', '1',
+    '-multiple_requests', '1',
+    '-reconnect', '1',
+    '-reconnect_on_network_error', '1',
+    '-reconnect_delay_max', '10'
+]
+
+def is_streamable(input_data):
+    return input_data.get("stream") and input_data["file_url"].lower().startswith(("http://", "https://"))
 
 def get_extension_from_format(format_name):
     # Mapping of common format names to file extensions
@@ -28,57 +45,184 @@ def get_extension_from_format(format_name):
     }
     return format_to_extension.get(format_name.lower(), 'mp4')  # Default to mp4 if unknown
 
-def get_metadata(filename, metadata_requests, job_id):
+# Output options that change which frame or picture ends up first in the output
+THUMBNAIL_COPIED_OPTIONS = ('-ss', '-vf', '-filter:v', '-s')
+
+# A mandatory input video stream specifier, e.g. 0:v, 1:v:0 or 2:V
+VIDEO_STREAM_SPEC = re.compile(r'^\d+:[vV](:\d+)?$')
+
+def get_input_video_index(input_data, input_path):
+    """
+    Index of the first video stream of an input as ffprobe reports it, or None when the
+    input has none or cannot be probed as given (e.g. it needs its own -f option).
+    """
+    if any(option["option"] == "-f" for option in input_data.get("options", [])):
+        return None
+    try:
+        stream = get_video_stream(input_path)
+    except ProbeError:
+        return None
+    return stream.get('index') if stream else None
+
+def is_video_label(filter_complex, label, seen=None):
+    """
+    True only when a filter_complex label certainly carries video: every chain input that
+    leads to it is a mandatory input video stream (N:v) or another such label. Chains
+    that start from a source filter or take any other input are not trusted.
+    """
+    seen = seen or set()
+    if label in seen:
+        return False
+    seen.add(label)
+    for chain in filter_complex.split(';'):
+        chain = chain.strip()
+        leading = re.match(r'^((?:\[[^\]]+\]\s*)+)', chain)
+        trailing = re.search(r'((?:\[[^\]]+\]\s*)+)$', chain)
+        if not trailing or f"[{label}]" not in trailing.group(1).replace(' ', ''):
+            continue
+        if not leading:
+            return False
+        body = chain[leading.end():trailing.start()]
+        if '[' in body:
+            # Labels inside the chain can bring in other streams
+            return False
+        inputs = re.findall(r'\[([^\]]+)\]', leading.group(1))
+        return all(
+            VIDEO_STREAM_SPEC.match(pad) or (not re.match(r'^\d', pad) and is_video_label(filter_complex, pad, seen))
+            for pad in inputs
+        )
+    return False
+
+def plan_thumbnail(output_options, filter_complex, thumbnail_filename, video_input_index):
+    """
+    Arguments for an extra output that writes the first frame of an output as a JPEG in
+    the same ffmpeg run, plus any filter_complex chains it needs and the output's
+    rewritten options. Returns None unless the output's first mapped video is certainly
+    video, in which case the thumbnail is taken from the finished file instead.
+
+    Input streams can feed any number of outputs, so they are mapped again. A
+    filter_complex label can only be consumed once, so a video label is split into a
+    branch for the output and a branch for the thumbnail. video_input_index(N) gives the
+    probed first video stream of input N, for maps of a whole input.
+    """
+    extra_chains = []
+    rewritten = [dict(option) for option in output_options]
+    thumbnail_args = []
+    for option in rewritten:
+        if option['option'] != '-map':
+            continue
+        spec = str(option.get('argument'))
+        if spec.startswith('['):
+            label = spec.strip('[]')
+            if not filter_complex or not is_video_label(filter_complex, label):
+                return None
+            extra_chains.append(f"[{label}]split=2[{label}_main][{label}_thumb]")
+            option['argument'] = f"[{label}_main]"
+            thumbnail_args.extend(['-map', f"[{label}_thumb]"])
+        elif spec.isdigit():
+            # A whole input: its first video stream is what the output starts with
+            stream_index = video_input_index(int(spec))
+            if stream_index is None:
+                continue
+            thumbnail_args.extend(['-map', f"{spec}:{stream_index}"])
+        elif VIDEO_STREAM_SPEC.match(spec):
+            thumbnail_args.extend(['-map', spec])
+        if thumbnail_args:
+            break
+    if not thumbnail_args:
+        return None
+
+    copies_filtered_label = any(arg.endswith('_thumb]') for arg in thumbnail_args)
+    for option in output_options:
+        if option['option'] in THUMBNAIL_COPIED_OPTIONS:
+            # -vf cannot be applied to a stream coming out of filter_complex
+            if option['option'] in ('-vf', '-filter:v') and copies_filtered_label:
+                continue
+            thumbnail_args.extend([option['option'], str(option['argument'])])
+    thumbnail_args.extend(['-frames:v', '1', '-update', '1', '-an', '-sn', thumbnail_filename])
+    return extra_chains, rewritten, thumbnail_args
+
+def generate_thumbnail(filename, thumbnail_filename, timestamp=None):
+    """
+    Write one frame of a finished output as a JPEG. With a timestamp the input is
+    fast-seeked, so only the frames from the preceding keyframe are decoded.
+    """
+    command = ['ffmpeg', '-y']
+    if timestamp:
+        command.extend(['-ss', str(timestamp)])
+    command.extend(['-i', filename, '-frames:v', '1', thumbnail_filename])
+    run_ffmpeg(command)
+
+def get_metadata(filename, metadata_requests, job_id, thumbnail_filename=None):
     metadata = {}
     if metadata_requests.get('thumbnail'):
-        thumbnail_filename = f"{os.path.splitext(filename)[0]}_thumbnail.jpg"
-        thumbnail_command = [
-            'ffmpeg',
-            '-i', filename,
-            '-vf', 'select=eq(n\,0)',
-            '-vframes', '1',
-            thumbnail_filename
-        ]
-        try:
-            subprocess.run(thumbnail_command, check=True, capture_output=True, text=True)
-            if os.path.exists(thumbnail_filename):
-                metadata['thumbnail'] = thumbnail_filename  # Return local path instead of URL
-        except subprocess.CalledProcessError as e:
-            print(f"Thumbnail generation failed: {e.stderr}")
+        if thumbnail_filename and os.path.exists(thumbnail_filename):
+            # Already written by the compose run itself
+            metadata['thumbnail'] = thumbnail_filename
+        else:
+            thumbnail_filename = f"{os.path.splitext(filename)[0]}_thumbnail.jpg"
+            try:
+                generate_thumbnail(filename, thumbnail_filename, metadata_requests.get('thumbnail_time'))
+                if os.path.exists(thumbnail_filename):
+                    metadata['thumbnail'] = thumbnail_filename  # Return local path instead of URL
+            except subprocess.CalledProcessError as e:
+                print(f"Thumbnail generation failed: {e.stderr}")
 
     if metadata_requests.get('filesize'):
         metadata['filesize'] = os.path.getsize(filename)
 
     if metadata_requests.get('encoder') or metadata_requests.get('duration') or metadata_requests.get('bitrate'):
-        ffprobe_command = [
-            'ffprobe',
-            '-v', 'quiet',
-            '-print_format', 'json',
-            '-show_format',
-            '-show_streams',
-            filename
-        ]
-        result = subprocess.run(ffprobe_command, capture_output=True, text=True)
-        probe_data = json.loads(result.stdout)
-        
+        # One cached ffprobe run serves all requested fields
         if metadata_requests.get('duration'):
-            metadata['duration'] = float(probe_data['format']['duration'])
+            metadata['duration'] = get_duration(filename)
         if metadata_requests.get('bitrate'):
-            metadata['bitrate'] = int(probe_data['format']['bit_rate'])
+            metadata['bitrate'] = get_bitrate(filename)
         
         if metadata_requests.get('encoder'):
-            metadata['encoder'] = {}
-            for stream in probe_data['streams']:
-                if stream['codec_type'] == 'video':
-                    metadata['encoder']['video'] = stream.get('codec_name', 'unknown')
-                elif stream['codec_type'] == 'audio':
-                    metadata['encoder']['audio'] = stream.get('codec_name', 'unknown')
+            metadata['encoder'] = get_codecs(filename)
 
     return metadata
 
+def stage_inputs(inputs, staged, job_id):
+    """
+    Download each distinct input URL once into `staged` (URL -> local path) and return
+    the local path for every entry of `inputs`; entries sharing a URL share a file.
+    Inputs with `stream: true` are not downloaded and ffmpeg reads their URL directly.
+    `staged` is filled as downloads finish, so the caller can remove everything that
+    was fetched even when a later download fails.
+    """
+    input_paths = []
+    downloaded_entries = 0
+    for input_data in inputs:
+        url = input_data["file_url"]
+        if is_streamable(input_data):
+            input_paths.append(url)
+            continue
+        if url not in staged:
+            staged[url] = download_file(url, STORAGE_PATH)
+        input_paths.append(staged[url])
+        downloaded_entries += 1
+
+    if len(staged) < downloaded_entries:
+        logger.info(f"Job {job_id}: Downloaded {len(staged)} unique inputs for {downloaded_entries} -i entries")
+    return input_paths
+
 def process_ffmpeg_compose(data, job_id):
-    output_filenames = []
-    
+    # Staged inputs are removed when the job ends, whether or not ffmpeg succeeded
+    staged = {}
+    try:
+        input_paths = stage_inputs(data["inputs"], staged, job_id)
+        return run_compose(data, job_id, input_paths)
+    finally:
+        for path in staged.values():
+            if os.path.exists(path):
+                os.remove(path)
+
+def build_compose_command(data, input_paths, output_filenames, inline_thumbnails):
+    """
+    The ffmpeg command for a compose request and, per output, the thumbnail file the
+    command writes itself (None where the thumbnail is left to get_metadata).
+    """
     # Build FFmpeg command
     command = ["ffmpeg"]
     
@@ -89,21 +233,59 @@ def process_ffmpeg_compose(data, job_id):
             command.append(str(option["argument"]))
     
     # Add inputs
-    for input_data in data["inputs"]:
+    for input_data, input_path in zip(data["inputs"], input_paths):
         if "options" in input_data:
             for option in input_data["options"]:
                 command.append(option["option"])
                 if "argument" in option and option["argument"] is not None:
                     command.append(str(option["argument"]))
-        input_path = download_file(input_data["file_url"], STORAGE_PATH)
+        if is_streamable(input_data):
+            # With an input -ss, only the byte ranges needed from that point on are fetched
+            command.extend(STREAM_INPUT_OPTIONS)
         command.extend(["-i", input_path])
     
+    filter_complex = ";".join(filter_obj["filter"] for filter_obj in data.get("filters", []))
+
+    video_indexes = {}
+    def video_input_index(index):
+        if index >= len(input_paths):
+            return None
+        if index not in video_indexes:
+            video_indexes[index] = get_input_video_index(data["inputs"][index], input_paths[index])
+        return video_indexes[index]
+
+    # Build outputs
+    output_args = []
+    thumbnail_filenames = []
+    for output, output_filename in zip(data["outputs"], output_filenames):
+        output_options = output["options"]
+        thumbnail_args = []
+        thumbnail_filename = None
+        if inline_thumbnails:
+            thumbnail_filename = f"{os.path.splitext(output_filename)[0]}_thumbnail.jpg"
+            plan = plan_thumbnail(output_options, filter_complex, thumbnail_filename, video_input_index)
+            if plan:
+                extra_chains, output_options, thumbnail_args = plan
+                filter_complex = ";".join([filter_complex] + extra_chains) if filter_complex else ";".join(extra_chains)
+            else:
+                thumbnail_filename = None
+        thumbnail_filenames.append(thumbnail_filename)
+        
+        for option in output_options:
+            output_args.append(option["option"])
+            if "argument" in option and option["argument"] is not None:
+                output_args.append(str(option["argument"]))
+        output_args.append(output_filename)
+        output_args.extend(thumbnail_args)
+    
     # Add filters
-    if data.get("filters"):
-        filter_complex = ";".join(filter_obj["filter"] for filter_obj in data["filters"])
+    if filter_complex:
         command.extend(["-filter_complex", filter_complex])
-    
-    # Add outputs
+    command.extend(output_args)
+    return command, thumbnail_filenames
+
+def run_compose(data, job_id, input_paths):
+    output_filenames = []
     for i, output in enumerate(data["outputs"]):
         format_name = None
         for option in output["options"]:
@@ -112,31 +294,34 @@ def process_ffmpeg_compose(data, job_id):
                 break
         
         extension = get_extension_from_format(format_name) if format_name else 'mp4'
-        output_filename = os.path.join(STORAGE_PATH, f"{job_id}_output_{i}.{extension}")
-        output_filenames.append(output_filename)
-        
-        for option in output["options"]:
-            command.append(option["option"])
-            if "argument" in option and option["argument"] is not None:
-                command.append(str(option["argument"]))
-        command.append(output_filename)
+        output_filenames.append(os.path.join(STORAGE_PATH, f"{job_id}_output_{i}.{extension}"))
+
+    metadata_requests = data.get("metadata") or {}
+    # A first-frame thumbnail can be written by this same run; a seek-to-time one is taken afterwards
+    inline_thumbnails = bool(metadata_requests.get('thumbnail') and not metadata_requests.get('thumbnail_time'))
+    command, thumbnail_filenames = build_compose_command(data, input_paths, output_filenames, inline_thumbnails)
     
     # Execute FFmpeg command
     try:
-        subprocess.run(command, check=True, capture_output=True, text=True)
+        run_ffmpeg(command, job_id=job_id)
     except subprocess.CalledProcessError as e:
-        raise Exception(f"FFmpeg command failed: {e.stderr}")
-    
-    # Clean up input files
-    for input_data in data["inputs"]:
-        input_path = os.path.join(STORAGE_PATH, os.path.basename(input_data["file_url"]))
-        if os.path.exists(input_path):
-            os.remove(input_path)
+        # Outputs on disk mean ffmpeg got past setting up the thumbnail chains, so they
+        # were not the cause; only a run that never wrote an output is repeated without them
+        if not any(thumbnail_filenames) or any(
+                os.path.exists(f) and os.path.getsize(f) > 0 for f in output_filenames):
+            raise Exception(f"FFmpeg command failed: {e.stderr}")
+        # The thumbnail outputs must never cost the main outputs: run the request as given
+        logger.warning(f"Job {job_id}: Compose with inline thumbnails failed, retrying without them")
+        command, thumbnail_filenames = build_compose_command(data, input_paths, output_filenames, False)
+        try:
+            run_ffmpeg(command, job_id=job_id)
+        except subprocess.CalledProcessError as e:
+            raise Exception(f"FFmpeg command failed: {e.stderr}")
     
     # Get metadata if requested
     metadata = []
     if data.get("metadata"):
-        for output_filename in output_filenames:
-            metadata.append(get_metadata(output_filename, data["metadata"], job_id))
+        for output_filename, thumbnail_filename in zip(output_filenames, thumbnail_filenames):
+            metadata.append(get_metadata(output_filename, data["metadata"], job_id, thumbnail_filename))
     
-    return output_filenames, metadata
\ No newline at end of file
+    return output_filenames, metadata
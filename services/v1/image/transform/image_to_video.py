@@ -2,12 +2,74 @@ import os
 import subprocess
 import logging
 from services.file_management import download_file
+from services.ffmpeg_runner import run_ffmpeg
+from services.encoding_profiles import video_args, container_args, is_x264
 from PIL import Image
 
 STORAGE_PATH = "/tmp/"
 logger = logging.getLogger(__name__)
 
-def process_image_to_video(image_url, length, frame_rate, zoom_speed, job_id, webhook_url=None):
+# zoompan positions the crop on whole pixels of its input, so the input is oversampled to
+# keep that rounding below a fraction of an output pixel. Each tier sets the largest
+# visible step (in output pixels) it accepts; encoder settings come from the encoding profile.
+QUALITY_TIERS = {
+    'fast': {'max_jitter': 1.0},
+    'balanced': {'max_jitter': 0.5},
+    'high': {'max_jitter': 0.25}
+}
+DEFAULT_QUALITY = os.environ.get('IMAGE_TO_VIDEO_QUALITY', 'balanced')
+
+# The previous renderer always worked at 4x the output (7680x4320 for 1080p)
+MAX_OVERSAMPLE = 4
+
+def working_size(output_size, zoom_factor, quality):
+    """
+    Smallest even input size at which a whole-pixel step of the crop stays within the
+    tier's jitter once zoomed: at zoom z an input pixel covers z * output / input output
+    pixels, so input = output * z / max_jitter, capped at MAX_OVERSAMPLE.
+    """
+    if zoom_factor <= 1:
+        return tuple(output_size)  # A still frame has no crop to position
+    oversample = min(MAX_OVERSAMPLE, max(1.0, zoom_factor / QUALITY_TIERS[quality]['max_jitter']))
+    return tuple(int(round(dimension * oversample / 2)) * 2 for dimension in output_size)
+
+def ken_burns_filter(length, frame_rate, zoom_speed, output_size, quality=DEFAULT_QUALITY, fit=False):
+    """
+    Filter chain turning one still image frame into `length` seconds of video zooming
+    into its centre. zoompan emits every frame from that single input frame, so the
+    scale runs once per clip instead of once per output frame. With fit=True the image
+    is cropped to the output's aspect ratio instead of stretched.
+    """
+    total_frames = int(length * frame_rate)
+    zoom_factor = 1 + (zoom_speed * length)
+    work_width, work_height = working_size(output_size, zoom_factor, quality)
+    output_width, output_height = output_size
+    scale = f"scale={work_width}:{work_height}"
+    if fit:
+        scale += f":force_original_aspect_ratio=increase,crop={work_width}:{work_height}"
+    return (
+        f"{scale},"
+        f"zoompan=z='min(1+({zoom_speed}*{length})*on/{total_frames}, {zoom_factor})':d={total_frames}"
+        f":x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':s={output_width}x{output_height}:fps={frame_rate}"
+    )
+
+def still_image_args(profile=None):
+    """Encoder arguments of the profile, tuned for still content when the encoder is x264."""
+    return video_args(profile) + (['-tune', 'stillimage'] if is_x264(profile) else [])
+
+def build_ken_burns_command(image_path, output_path, length, frame_rate, zoom_speed, output_size, quality=DEFAULT_QUALITY, profile=None):
+    """ffmpeg command rendering one image as a Ken Burns clip."""
+    total_frames = int(length * frame_rate)
+    return [
+        'ffmpeg', '-y', '-i', image_path,
+        '-vf', ken_burns_filter(length, frame_rate, zoom_speed, output_size, quality),
+        '-frames:v', str(total_frames),
+        *still_image_args(profile),
+        *container_args(profile, output_path),
+        output_path
+    ]
+
+def process_image_to_video(image_url, length, frame_rate, zoom_speed, job_id, webhook_url=None, quality=DEFAULT_QUALITY, profile=None):
     try:
         # Download the image file
         image_path = download_file(image_url, STORAGE_PATH)
@@ -22,35 +84,24 @@ def process_image_to_video(image_url, length, frame_rate, zoom_speed, job_id, we
         output_path = os.path.join(STORAGE_PATH, f"{job_id}.mp4")
 
         # Determine orientation and set appropriate dimensions
-        if width > height:
-            scale_dims = "7680:4320"
-            output_dims = "1920x1080"
-        else:
-            scale_dims = "4320:7680"
-            output_dims = "1080x1920"
-
-        # Calculate total frames and zoom factor
+        output_size = (1920, 1080) if width > height else (1080, 1920)
+
         total_frames = int(length * frame_rate)
         zoom_factor = 1 + (zoom_speed * length)
-
-        logger.info(f"Using scale dimensions: {scale_dims}, output dimensions: {output_dims}")
         logger.info(f"Video length: {length}s, Frame rate: {frame_rate}fps, Total frames: {total_frames}")
-        logger.info(f"Zoom speed: {zoom_speed}/s, Final zoom factor: {zoom_factor}")
+        logger.info(f"Zoom speed: {zoom_speed}/s, Final zoom factor: {zoom_factor}, Quality: {quality}, Profile: {profile}")
 
         # Prepare FFmpeg command
-        cmd = [
-            'ffmpeg', '-framerate', str(frame_rate), '-loop', '1', '-i', image_path,
-            '-vf', f"scale={scale_dims},zoompan=z='min(1+({zoom_speed}*{length})*on/{total_frames}, {zoom_factor})':d={total_frames}:x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':s={output_dims}",
-            '-c:v', 'libx264', '-t', str(length), '-pix_fmt', 'yuv420p', output_path
-        ]
+        cmd = build_ken_burns_command(image_path, output_path, length, frame_rate, zoom_speed, output_size, quality, profile)
 
         logger.info(f"Running FFmpeg command: {' '.join(cmd)}")
 
         # Run FFmpeg command
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            logger.error(f"FFmpeg command failed. Error: {result.stderr}")
-            raise subprocess.CalledProcessError(result.returncode, cmd, result.stdout, result.stderr)
+        try:
+            run_ffmpeg(cmd, job_id=job_id, duration=length)
+        except subprocess.CalledProcessError as e:
+            logger.error(f"FFmpeg command failed. Error: {e.stderr}")
+            raise
 
         logger.info(f"Video created successfully: {output_path}")
 
@@ -60,4 +111,4 @@ def process_image_to_video(image_url, length, frame_rate, zoom_speed, job_id, we
         return output_path
     except Exception as e:
         logger.error(f"Error in process_image_to_video: {str(e)}", exc_info=True)
-        raise
\ No newline at end of file
+        raise
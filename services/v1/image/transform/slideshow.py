@@ -0,0 +1,94 @@
+import os
+import logging
+from PIL import Image
+from services.file_management import download_file
+from services.ffmpeg_runner import run_ffmpeg
+from services.encoding_profiles import container_args
+from services.v1.image.transform.image_to_video import ken_burns_filter, still_image_args, DEFAULT_QUALITY
+
+STORAGE_PATH = "/tmp/"
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRANSITION = {"type": "fade", "duration": 0.5}
+
+def build_slideshow_graph(images, frame_rate, output_size, quality=DEFAULT_QUALITY, default_transition=None):
+    """
+    filter_complex rendering every image as a Ken Burns clip and joining the clips in
+    the same graph: xfade where a transition is set, a hard cut (concat) for 'none'.
+    Each image's transition leads into the next image and overlaps both clips, so it
+    must be shorter than either. Returns (filter_complex, output label, total duration).
+    """
+    default_transition = default_transition or DEFAULT_TRANSITION
+    # Clips last a whole number of frames; offsets are computed from those lengths
+    lengths = [int(image['duration'] * frame_rate) / frame_rate for image in images]
+    chains = []
+    for index, image in enumerate(images):
+        chain = ken_burns_filter(
+            lengths[index], frame_rate, image.get('zoom_speed', 0) / 100, output_size, quality, fit=True
+        )
+        chains.append(f"[{index}:v]{chain},setsar=1,format=yuv420p[clip{index}]")
+
+    label = "[clip0]"
+    total_duration = lengths[0]
+    for index in range(1, len(images)):
+        transition = images[index - 1].get('transition') or default_transition
+        overlap = transition.get('duration', DEFAULT_TRANSITION['duration'])
+        output_label = f"[join{index}]"
+        if transition['type'] == 'none' or overlap <= 0:
+            chains.append(f"{label}[clip{index}]concat=n=2:v=1:a=0{output_label}")
+            total_duration += lengths[index]
+        else:
+            if overlap >= min(lengths[index - 1], lengths[index]):
+                raise ValueError(
+                    f"Transition after image {index - 1} ({overlap}s) must be shorter than both images it joins"
+                )
+            offset = total_duration - overlap
+            chains.append(
+                f"{label}[clip{index}]xfade=transition={transition['type']}"
+                f":duration={overlap}:offset={offset:.6f}{output_label}"
+            )
+            total_duration = offset + lengths[index]
+        label = output_label
+
+    return ";".join(chains), label, total_duration
+
+def process_slideshow(images, job_id, frame_rate=30, quality=DEFAULT_QUALITY, default_transition=None, profile=None):
+    """
+    Render a slideshow of still images in a single ffmpeg process and return the local
+    output path. The output is landscape 1920x1080 unless the first image is portrait.
+    Every image's scaled frame stays in memory for the whole run, so the working size of
+    the quality tier bounds how many images one request can hold.
+    """
+    image_paths = []
+    output_path = os.path.join(STORAGE_PATH, f"{job_id}_slideshow.mp4")
+    try:
+        for image in images:
+            image_paths.append(download_file(image['image_url'], STORAGE_PATH))
+        logger.info(f"Job {job_id}: Downloaded {len(image_paths)} slideshow images")
+
+        with Image.open(image_paths[0]) as first_image:
+            output_size = (1920, 1080) if first_image.width >= first_image.height else (1080, 1920)
+
+        filter_complex, output_label, total_duration = build_slideshow_graph(
+            images, frame_rate, output_size, quality, default_transition
+        )
+
+        command = ['ffmpeg', '-y']
+        for image_path in image_paths:
+            command.extend(['-i', image_path])
+        command.extend([
+            '-filter_complex', filter_complex,
+            '-map', output_label,
+            *still_image_args(profile),
+            '-r', str(frame_rate),
+            *container_args(profile, output_path),
+            output_path
+        ])
+
+        logger.info(f"Job {job_id}: Rendering {total_duration:.2f}s slideshow of {len(images)} images")
+        run_ffmpeg(command, job_id=job_id, duration=total_duration)
+        return output_path
+    finally:
+        for image_path in image_paths:
+            if os.path.exists(image_path):
+                os.remove(image_path)
@@ -4,6 +4,8 @@ import srt
 from datetime import timedelta
 from whisper.utils import WriteSRT, WriteVTT
 from services.file_management import download_file
+from services.whisper_toolkit import transcribe_media_file
+from services.v1.media.transcript_segments import to_compact_segments, SEGMENT_WRITERS
 import logging
 
 # Set up logging
@@ -13,7 +15,7 @@ logging.basicConfig(level=logging.INFO)
 # Set the default local storage directory
 STORAGE_PATH = "/tmp/"
 
-def process_transcribe_media(media_url, task, include_text, include_srt, include_segments, word_timestamps, response_type, language, job_id):
+def process_transcribe_media(media_url, task, include_text, include_srt, include_segments, word_timestamps, response_type, language, job_id, vad=False, segments_format='full'):
     """Transcribe or translate media and return the transcript/translation, SRT or VTT file path."""
     logger.info(f"Starting {task} for media URL: {media_url}")
     #input_filename = download_file(media_url, os.path.join(STORAGE_PATH, 'input_media'))
@@ -23,21 +25,15 @@ def process_transcribe_media(media_url, task, include_text, include_srt, include
         # Load a larger model for better translation quality
         #model_size = "large" if task == "translate" else "base"
         model_size = "base"
-        model = whisper.load_model(model_size)
-        logger.info(f"Loaded Whisper {model_size} model")
 
-        # Configure transcription/translation options
-        options = {
-            "task": task,
-            "word_timestamps": word_timestamps,
-            "verbose": False
-        }
-
-        # Add language specification if provided
-        if language:
-            options["language"] = language
-
-        result = model.transcribe(media_url, **options)
+        result, vad_stats = transcribe_media_file(
+            media_url,
+            model_size=model_size,
+            task=task,
+            language=language,
+            word_timestamps=word_timestamps,
+            vad=vad
+        )
         
         # For translation task, the result['text'] will be in English
         text = None
@@ -60,15 +56,18 @@ def process_transcribe_media(media_url, task, include_text, include_srt, include
             
             srt_text = srt.compose(srt_subtitles)
 
-        if include_segments is True:
-            segments_json = result['segments']
+        if include_segments is True and response_type == "direct":
+            if segments_format == 'compact':
+                segments_json = to_compact_segments(result['segments'])
+            else:
+                segments_json = result['segments']
 
         os.remove(media_url)
         logger.info(f"Removed local file: {media_url}")
         logger.info(f"{task.capitalize()} successful, output type: {response_type}")
 
         if response_type == "direct":
-            return text, srt_text, segments_json
+            return text, srt_text, segments_json, vad_stats
         else:
             
             if include_text is True:
@@ -76,7 +75,7 @@ def process_transcribe_media(media_url, task, include_text, include_srt, include
                 with open(text_filename, 'w') as f:
                     f.write(text)
             else:
-                text_file = None
+                text_filename = None
             
             if include_srt is True:
                 srt_filename = os.path.join(STORAGE_PATH, f"{job_id}.srt")
@@ -86,13 +85,14 @@ def process_transcribe_media(media_url, task, include_text, include_srt, include
                 srt_filename = None
 
             if include_segments is True:
-                segments_filename = os.path.join(STORAGE_PATH, f"{job_id}.json")
-                with open(segments_filename, 'w') as f:
-                    f.write(str(segments_json))
+                # Stream straight from the Whisper result instead of building a second copy
+                write_segments, extension = SEGMENT_WRITERS[segments_format]
+                segments_filename = os.path.join(STORAGE_PATH, f"{job_id}.{extension}")
+                write_segments(result['segments'], segments_filename)
             else:
                 segments_filename = None
 
-            return text_filename, srt_filename, segments_filename 
+            return text_filename, srt_filename, segments_filename, vad_stats
 
     except Exception as e:
         logger.error(f"{task.capitalize()} failed: {str(e)}")
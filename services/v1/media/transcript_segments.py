@@ -0,0 +1,155 @@
+import json
+import struct
+import numpy as np
+
+# Binary segments layout (all little-endian):
+#   header:   magic b"NCAS", uint16 version, uint32 segment count, uint32 word count
+#   columns:  float32 start[segments], float32 end[segments],
+#             uint32 word_segment[words], float32 word_start[words], float32 word_end[words],
+#             float32 word_probability[words] (NaN where the probability is missing)
+#   strings:  segment texts then word texts, each as uint32 byte length + UTF-8 bytes
+BINARY_MAGIC = b"NCAS"
+BINARY_VERSION = 1
+
+def _iter_words(segments):
+    for index, segment in enumerate(segments):
+        for word in segment.get('words') or []:
+            yield index, word
+
+def to_compact_segments(segments):
+    """Return segments as parallel arrays instead of one dict per segment and word."""
+    compact = {
+        "format": "compact",
+        "start": [segment['start'] for segment in segments],
+        "end": [segment['end'] for segment in segments],
+        "text": [segment['text'] for segment in segments]
+    }
+    if any(segment.get('words') for segment in segments):
+        compact["words"] = {
+            "segment": [index for index, _ in _iter_words(segments)],
+            "start": [word['start'] for _, word in _iter_words(segments)],
+            "end": [word['end'] for _, word in _iter_words(segments)],
+            "word": [word['word'] for _, word in _iter_words(segments)],
+            "probability": [word.get('probability') for _, word in _iter_words(segments)]
+        }
+    return compact
+
+def _write_json_array(f, values):
+    f.write('[')
+    for i, value in enumerate(values):
+        if i:
+            f.write(',')
+        f.write(json.dumps(value, default=_json_default))
+    f.write(']')
+
+def _json_default(value):
+    # Whisper results can carry NumPy scalars
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+def write_full_segments(segments, path):
+    """Stream Whisper's segment dicts to a JSON file one segment at a time."""
+    with open(path, 'w', encoding='utf-8') as f:
+        _write_json_array(f, segments)
+
+def write_compact_segments(segments, path):
+    """
+    Stream the compact parallel-array format to a JSON file column by column,
+    without building the compact structure in memory first.
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"format":"compact","start":')
+        _write_json_array(f, (segment['start'] for segment in segments))
+        f.write(',"end":')
+        _write_json_array(f, (segment['end'] for segment in segments))
+        f.write(',"text":')
+        _write_json_array(f, (segment['text'] for segment in segments))
+        if any(segment.get('words') for segment in segments):
+            f.write(',"words":{"segment":')
+            _write_json_array(f, (index for index, _ in _iter_words(segments)))
+            for key in ('start', 'end', 'word'):
+                f.write(f',"{key}":')
+                _write_json_array(f, (word[key] for _, word in _iter_words(segments)))
+            f.write(',"probability":')
+            _write_json_array(f, (word.get('probability') for _, word in _iter_words(segments)))
+            f.write('}')
+        f.write('}')
+
+def write_binary_segments(segments, path):
+    """Stream segments to the compact binary layout described at the top of this module."""
+    word_count = sum(len(segment.get('words') or []) for segment in segments)
+    with open(path, 'wb') as f:
+        f.write(BINARY_MAGIC)
+        f.write(struct.pack('<HII', BINARY_VERSION, len(segments), word_count))
+
+        for values, dtype in (
+            ((segment['start'] for segment in segments), '<f4'),
+            ((segment['end'] for segment in segments), '<f4'),
+            ((index for index, _ in _iter_words(segments)), '<u4'),
+            ((word['start'] for _, word in _iter_words(segments)), '<f4'),
+            ((word['end'] for _, word in _iter_words(segments)), '<f4'),
+            ((_probability_value(word) for _, word in _iter_words(segments)), '<f4')
+        ):
+            np.fromiter(values, dtype=dtype).tofile(f)
+
+        for text in (segment['text'] for segment in segments):
+            _write_string(f, text)
+        for _, word in _iter_words(segments):
+            _write_string(f, word['word'])
+
+def _probability_value(word):
+    # None has no float32 value; NaN stands for it and is read back as None
+    probability = word.get('probability')
+    return float('nan') if probability is None else probability
+
+def _write_string(f, text):
+    encoded = text.encode('utf-8')
+    f.write(struct.pack('<I', len(encoded)))
+    f.write(encoded)
+
+def read_binary_segments(path):
+    """Read a binary segments file back into the compact parallel-array format."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:4] != BINARY_MAGIC:
+        raise ValueError("Not a binary segments file")
+    version, segment_count, word_count = struct.unpack_from('<HII', data, 4)
+    if version != BINARY_VERSION:
+        raise ValueError(f"Unsupported binary segments version {version}")
+
+    offset = 4 + struct.calcsize('<HII')
+    columns = []
+    for count, dtype in ((segment_count, '<f4'), (segment_count, '<f4'), (word_count, '<u4'),
+                         (word_count, '<f4'), (word_count, '<f4'), (word_count, '<f4')):
+        columns.append(np.frombuffer(data, dtype=dtype, count=count, offset=offset).tolist())
+        offset += 4 * count
+
+    strings = []
+    for _ in range(segment_count + word_count):
+        (length,) = struct.unpack_from('<I', data, offset)
+        offset += 4
+        strings.append(data[offset:offset + length].decode('utf-8'))
+        offset += length
+
+    compact = {
+        "format": "compact",
+        "start": columns[0],
+        "end": columns[1],
+        "text": strings[:segment_count]
+    }
+    if word_count:
+        compact["words"] = {
+            "segment": columns[2],
+            "start": columns[3],
+            "end": columns[4],
+            "word": strings[segment_count:],
+            "probability": [None if probability != probability else probability for probability in columns[5]]
+        }
+    return compact
+
+SEGMENT_WRITERS = {
+    'full': (write_full_segments, 'json'),
+    'compact': (write_compact_segments, 'json'),
+    'binary': (write_binary_segments, 'bin')
+}
@@ -2,27 +2,53 @@ import os
 import ffmpeg
 import requests
 from services.file_management import download_file
+from services.ffmpeg_runner import run_ffmpeg
+from services.ffprobe import get_audio_stream, ProbeError
 
 # Set the default local storage directory
 STORAGE_PATH = "/tmp/"
 
+# An MP3 source within this fraction of the requested bitrate is copied instead of re-encoded
+BITRATE_TOLERANCE = 0.05
+
+def can_copy_mp3(audio_stream, bitrate):
+    if not audio_stream or audio_stream.get('codec_name') != 'mp3':
+        return False
+    try:
+        source_bitrate = int(audio_stream.get('bit_rate'))
+    except (TypeError, ValueError):
+        return False
+    requested_bitrate = int(bitrate.rstrip('k')) * 1000
+    return abs(source_bitrate - requested_bitrate) <= requested_bitrate * BITRATE_TOLERANCE
+
 def process_media_to_mp3(media_url, job_id, bitrate='128k', webhook_url=None):
-    """Convert media to MP3 format with specified bitrate."""
+    """
+    Convert media to MP3 format with specified bitrate. Only the first audio stream is
+    read (video is never decoded), and an MP3 source already at the requested bitrate
+    is stream-copied.
+    """
     input_filename = download_file(media_url, os.path.join(STORAGE_PATH, f"{job_id}_input"))
     output_filename = f"{job_id}.mp3"
     output_path = os.path.join(STORAGE_PATH, output_filename)
 
     try:
-        # Convert media file to MP3 with specified bitrate
-        (
-            ffmpeg
-            .input(input_filename)
-            .output(output_path, acodec='libmp3lame', audio_bitrate=bitrate)
-            .overwrite_output()
-            .run(capture_stdout=True, capture_stderr=True)
-        )
+        try:
+            audio_stream = get_audio_stream(input_filename)
+        except ProbeError:
+            audio_stream = None  # Let ffmpeg try and report the problem
+
+        copy_audio = can_copy_mp3(audio_stream, bitrate)
+        command = ['ffmpeg', '-y', '-i', input_filename, '-vn', '-sn', '-dn', '-map', '0:a:0']
+        if copy_audio:
+            command.extend(['-c:a', 'copy'])
+        else:
+            # Convert media file to MP3 with specified bitrate
+            command.extend(['-c:a', 'libmp3lame', '-b:a', bitrate])
+        command.append(output_path)
+
+        run_ffmpeg(command, job_id=job_id)
         os.remove(input_filename)
-        print(f"Conversion successful: {output_path} with bitrate {bitrate}")
+        print(f"Conversion successful: {output_path} with bitrate {bitrate}{' (stream copy)' if copy_audio else ''}")
 
         # Ensure the output file exists locally before attempting upload
         if not os.path.exists(output_path):
@@ -55,11 +81,13 @@ def process_video_combination(media_urls, job_id, webhook_url=None):
                 concat_file.write(f"file '{os.path.abspath(input_file)}'\n")
 
         # Use the concat demuxer to concatenate the videos
-        (
+        command = (
             ffmpeg.input(concat_file_path, format='concat', safe=0).
                 output(output_path, c='copy').
-                run(overwrite_output=True)
+                overwrite_output().
+                compile()
         )
+        run_ffmpeg(command, job_id=job_id)
 
         # Clean up input files
         for f in input_files:
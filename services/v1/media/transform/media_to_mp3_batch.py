@@ -0,0 +1,57 @@
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from services.cloud_storage import upload_file
+from services.job_status import update_job_progress
+from services.v1.media.transform.media_to_mp3 import process_media_to_mp3
+
+logger = logging.getLogger(__name__)
+
+# Items converted at the same time within one batch job
+MP3_BATCH_WORKERS = int(os.environ.get('MP3_BATCH_WORKERS', 4))
+
+def process_media_to_mp3_batch(media_items, job_id, bitrate='128k', on_result=None):
+    """
+    Convert many media URLs to MP3 in parallel within one job. A failing item does not
+    stop the others; on_result(index, result) is called as each item finishes and the
+    results are returned in input order.
+
+    Items run ffmpeg under their own ids ("<job_id>_<index>"), which are not tracked;
+    the batch job's status carries the item counts instead.
+    """
+    counts = {'completed': 0, 'failed': 0}
+    counts_lock = threading.Lock()
+
+    def record(result):
+        with counts_lock:
+            counts['completed'] += 1
+            counts['failed'] += 1 if result['status'] == 'error' else 0
+            update_job_progress(job_id, {
+                'completed': counts['completed'],
+                'failed': counts['failed'],
+                'total': len(media_items),
+                'percent': round(counts['completed'] / len(media_items) * 100, 1),
+                'finished': counts['completed'] == len(media_items)
+            })
+
+    def convert(index):
+        item = media_items[index]
+        result = {"media_url": item['media_url'], "id": item.get('id')}
+        try:
+            output_path = process_media_to_mp3(item['media_url'], f"{job_id}_{index}", bitrate)
+            try:
+                result.update({"status": "success", "url": upload_file(output_path)})
+            finally:
+                os.remove(output_path)
+        except Exception as e:
+            logger.error(f"Job {job_id}: Batch item {index} failed - {str(e)}")
+            result.update({"status": "error", "error": str(e)})
+        record(result)
+        if on_result:
+            on_result(index, result)
+        return result
+
+    workers = max(1, min(MP3_BATCH_WORKERS, len(media_items)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(convert, range(len(media_items))))
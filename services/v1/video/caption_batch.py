@@ -0,0 +1,148 @@
+import os
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from services.file_management import download_file
+from services.cloud_storage import upload_file
+from services.font_index import get_available_fonts
+from services.v1.video.caption_video import (
+    STORAGE_PATH, normalize_caption_options, resolve_style_options, generate_ass_header,
+    generate_transcription, get_video_resolution, srt_to_transcription_result, is_url,
+    download_captions, write_ass_file, burn_subtitles, mux_soft_subtitles
+)
+
+logger = logging.getLogger(__name__)
+
+# Transcription is bound by the shared Whisper model, burn-in by ffmpeg; each stage has its own pool
+CAPTION_BATCH_TRANSCRIBE_WORKERS = int(os.environ.get('CAPTION_BATCH_TRANSCRIBE_WORKERS', 1))
+CAPTION_BATCH_RENDER_WORKERS = int(os.environ.get('CAPTION_BATCH_RENDER_WORKERS', 2))
+
+def process_caption_batch(videos, settings, replace, job_id, language='auto', render='burn', output_format='mp4', on_result=None, profile=None):
+    """
+    Caption many videos with one style. Settings, replace rules and fonts are validated
+    once and the ASS header is built once per video resolution. Videos move through two
+    pipelined stages, download + transcription and subtitle render + upload, so one
+    video is being transcribed while earlier ones are being burned in.
+
+    on_result(index, result) is called as each video finishes. Returns the per-video
+    results in input order, or a dict with 'error' when the shared options are invalid.
+    """
+    normalized = normalize_caption_options(settings, replace, job_id)
+    if isinstance(normalized, dict):
+        return normalized
+    style_options, replace_dict = normalized
+
+    font_family = style_options.get('font_family', 'Arial')
+    available_fonts = get_available_fonts()
+    if font_family not in available_fonts:
+        logger.warning(f"Job {job_id}: Font '{font_family}' not found.")
+        return {"error": f"Font '{font_family}' not available.", "available_fonts": available_fonts}
+
+    style_type = style_options.get('style', 'classic').lower()
+
+    headers = {}
+    headers_lock = threading.Lock()
+
+    def get_header(video_resolution):
+        with headers_lock:
+            if video_resolution not in headers:
+                headers[video_resolution] = generate_ass_header(
+                    resolve_style_options(style_options, video_resolution), video_resolution
+                )
+            return headers[video_resolution]
+
+    def transcribe_stage(index, item):
+        captions = item.get('captions')
+        if captions and is_url(captions):
+            captions = download_captions(captions)
+
+        video_path = download_file(item['video_url'], STORAGE_PATH)
+        logger.info(f"Job {job_id}: Batch item {index} downloaded to {video_path}")
+
+        try:
+            if captions and '[Script Info]' in captions:
+                return video_path, None, captions
+            if captions:
+                if style_type != 'classic':
+                    raise ValueError("Only 'classic' style is supported for SRT captions.")
+                return video_path, srt_to_transcription_result(captions), None
+            return video_path, generate_transcription(video_path, language=language), None
+        except Exception:
+            # On success the render stage owns the file; on failure nothing else will remove it
+            os.remove(video_path)
+            raise
+
+    def render_stage(index, video_path, transcription_result, ass_content):
+        subtitle_path = os.path.join(STORAGE_PATH, f"{job_id}_{index}.ass")
+        output_path = os.path.join(STORAGE_PATH, f"{job_id}_{index}_captioned.{output_format}")
+        try:
+            if transcription_result is not None:
+                video_resolution = get_video_resolution(video_path)
+                write_ass_file(
+                    subtitle_path, transcription_result, style_type, style_options, replace_dict,
+                    video_resolution, get_header(video_resolution)
+                )
+            else:
+                with open(subtitle_path, 'w', encoding='utf-8') as f:
+                    f.write(ass_content)
+
+            if render == 'soft':
+                mux_soft_subtitles(video_path, subtitle_path, output_path, output_format, job_id)
+            else:
+                burn_subtitles(video_path, subtitle_path, output_path, job_id, profile)
+
+            return upload_file(output_path)
+        finally:
+            for path in (video_path, subtitle_path, output_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    finished = queue.Queue()
+    # Transcription outruns rendering; cap the downloaded videos waiting for a render slot
+    in_flight = threading.BoundedSemaphore(CAPTION_BATCH_RENDER_WORKERS * 2)
+
+    def item_result(index, error=None, cloud_url=None):
+        item = videos[index]
+        result = {"video_url": item['video_url'], "id": item.get('id')}
+        if error is None:
+            result.update({"status": "success", "url": cloud_url})
+        else:
+            logger.error(f"Job {job_id}: Batch item {index} failed - {error}")
+            result.update({"status": "error", "error": error})
+        return result
+
+    def run_render(render_pool, index, prepared):
+        try:
+            cloud_url = render_stage(index, *prepared)
+            finished.put((index, item_result(index, cloud_url=cloud_url)))
+        except Exception as e:
+            finished.put((index, item_result(index, error=str(e))))
+        finally:
+            in_flight.release()
+
+    def run_transcribe(render_pool, index):
+        in_flight.acquire()
+        try:
+            prepared = transcribe_stage(index, videos[index])
+        except Exception as e:
+            in_flight.release()
+            finished.put((index, item_result(index, error=str(e))))
+            return
+        # Hand over to the render stage and go straight to the next transcription
+        render_pool.submit(run_render, render_pool, index, prepared)
+
+    results = [None] * len(videos)
+    with ThreadPoolExecutor(max_workers=CAPTION_BATCH_RENDER_WORKERS) as render_pool, \
+            ThreadPoolExecutor(max_workers=CAPTION_BATCH_TRANSCRIBE_WORKERS) as transcribe_pool:
+        for index in range(len(videos)):
+            transcribe_pool.submit(run_transcribe, render_pool, index)
+
+        for _ in range(len(videos)):
+            index, result = finished.get()
+            results[index] = result
+            logger.info(f"Job {job_id}: Batch item {index} finished with status {result['status']}")
+            if on_result:
+                on_result(index, result)
+
+    return results
@@ -0,0 +1,147 @@
+import re
+
+# Upper bound on memoized text transformations per job; transcripts repeat a small vocabulary
+TRANSFORM_CACHE_SIZE = 100000
+
+def format_ass_time(seconds):
+    """Convert float seconds to ASS time format H:MM:SS.cc"""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    secs = int(seconds % 60)
+    centiseconds = int(round((seconds - int(seconds)) * 100))
+    return f"{hours}:{minutes:02}:{secs:02}.{centiseconds:02}"
+
+def split_lines(text, max_words_per_line):
+    """Split text into multiple lines if max_words_per_line > 0."""
+    if max_words_per_line <= 0:
+        return [text]
+    words = text.split()
+    lines = [' '.join(words[i:i+max_words_per_line]) for i in range(0, len(words), max_words_per_line)]
+    return lines
+
+class TextTransformer:
+    """
+    Applies a job's find/replace rules and all_caps to caption text, with the same
+    result as process_subtitle_text(text, replace_dict, all_caps, 0).
+
+    The rules are compiled once per job. A single pattern matching any of the find
+    strings screens the text first: when none of them occur, no rule can fire, so the
+    per-rule substitutions only run on the few words that actually need them.
+    """
+    def __init__(self, replace_dict, all_caps):
+        self.all_caps = all_caps
+        self.rules = [(re.compile(re.escape(old), re.IGNORECASE), new) for old, new in replace_dict.items()]
+        self.screen = None
+        if replace_dict:
+            self.screen = re.compile('|'.join(re.escape(old) for old in replace_dict), re.IGNORECASE)
+        self.cache = {}
+
+    def __call__(self, text):
+        result = self.cache.get(text)
+        if result is None:
+            result = text
+            if self.screen is not None and self.screen.search(text):
+                # Rules still run in order so chained replacements behave as before
+                for pattern, new in self.rules:
+                    result = pattern.sub(new, result)
+            if self.all_caps:
+                result = result.upper()
+            if len(self.cache) < TRANSFORM_CACHE_SIZE:
+                self.cache[text] = result
+        return result
+
+def dialogue(start, end, text):
+    return f"Dialogue: 0,{format_ass_time(start)},{format_ass_time(end)},Default,,0,0,0,,{text}"
+
+def classic_events(segments, transform, position_tag, max_words_per_line):
+    for segment in segments:
+        text = segment['text'].strip().replace('\n', ' ')
+        lines = split_lines(text, max_words_per_line)
+        processed_text = '\\N'.join(transform(line) for line in lines)
+        yield dialogue(segment['start'], segment['end'], f"{position_tag}{processed_text}")
+
+def karaoke_events(segments, transform, position_tag, max_words_per_line, word_color):
+    prefix = f"{position_tag}{{\\c{word_color}}}"
+    for segment in segments:
+        words = segment.get('words', [])
+        if not words:
+            continue
+        timed_words = [
+            f"{{\\k{int(round((w_info['end'] - w_info['start']) * 100))}}}{transform(w_info.get('word', ''))} "
+            for w_info in words
+        ]
+        step = max_words_per_line if max_words_per_line > 0 else len(timed_words)
+        lines = [''.join(timed_words[i:i+step]).strip() for i in range(0, len(timed_words), step)]
+        yield dialogue(words[0]['start'], words[-1]['end'], prefix + '\\N'.join(lines))
+
+def _line_sets(segment, transform, max_words_per_line):
+    """Transformed (text, start, end) words of a segment, grouped into display lines."""
+    processed_words = []
+    for w_info in segment.get('words', []):
+        w = transform(w_info.get('word', ''))
+        if w:
+            processed_words.append((w, w_info['start'], w_info['end']))
+    if not processed_words:
+        return []
+    step = max_words_per_line if max_words_per_line > 0 else len(processed_words)
+    return [processed_words[i:i+step] for i in range(0, len(processed_words), step)]
+
+def current_word_events(segments, transform, position_tag, max_words_per_line, line_color, open_tag, close_tag):
+    """
+    One event per word showing its whole line with the current word wrapped in
+    open_tag/close_tag (highlight and underline styles).
+
+    The line is joined once and each event is cut from it by offset, so the work per
+    event is proportional to the event's own length.
+    """
+    prefix = f"{position_tag}{{\\c{line_color}}}"
+    for segment in segments:
+        for line_set in _line_sets(segment, transform, max_words_per_line):
+            line = ' '.join(w_text for w_text, _, _ in line_set)
+            offset = 0
+            for w_text, w_start, w_end in line_set:
+                end_offset = offset + len(w_text)
+                yield dialogue(
+                    w_start, w_end,
+                    f"{prefix}{line[:offset]}{open_tag}{w_text}{close_tag}{line[end_offset:]}"
+                )
+                offset = end_offset + 1
+
+def highlight_line_events(segments, transform, position_tag, max_words_per_line, line_color, word_color):
+    """
+    One event per line for the highlight style. Each word carries \\t overrides that
+    switch it to word_color while it is spoken, so libass lays the line out once
+    instead of once per word.
+    """
+    for segment in segments:
+        for line_set in _line_sets(segment, transform, max_words_per_line):
+            line_start = line_set[0][1]
+            words = []
+            for w_text, w_start, w_end in line_set:
+                # \t times are milliseconds relative to the event start
+                on = int(round((w_start - line_start) * 1000))
+                off = max(int(round((w_end - line_start) * 1000)), on + 1)
+                words.append(
+                    f"{{\\c{line_color}\\t({on},{on + 1},\\c{word_color})\\t({off},{off + 1},\\c{line_color})}}{w_text}"
+                )
+            yield dialogue(line_start, line_set[-1][2], position_tag + ' '.join(words))
+
+def word_by_word_events(segments, transform, position_tag, word_color):
+    prefix = f"{position_tag}{{\\c{word_color}}}"
+    for segment in segments:
+        for w_info in segment.get('words', []):
+            w = transform(w_info.get('word', ''))
+            if not w:
+                continue
+            yield dialogue(w_info['start'], w_info['end'], prefix + w)
+
+def write_events(f, events):
+    """Stream Dialogue lines to an open file; returns the number of events written."""
+    count = 0
+    for line in events:
+        if count:
+            f.write('\n')
+        f.write(line)
+        count += 1
+    f.write('\n')
+    return count
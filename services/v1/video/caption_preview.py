@@ -0,0 +1,75 @@
+import os
+import logging
+from services.ffmpeg_runner import run_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREVIEW_SECONDS = 10
+
+def _shifted_subtitles_filter(subtitle_path, offset):
+    # Input seeking restarts timestamps at zero; shift them back so the subtitles
+    # filter shows the events that belong at `offset` in the full video
+    return f"setpts=PTS+{offset:.6f}/TB,subtitles='{subtitle_path}',setpts=PTS-STARTPTS"
+
+def render_preview_clip(video_path, subtitle_path, output_path, start, duration, job_id=None):
+    """Burn subtitles into a short window of the video only, encoded for speed."""
+    command = [
+        'ffmpeg', '-y',
+        '-ss', f"{start:.6f}",
+        '-i', video_path,
+        '-t', f"{duration:.6f}",
+        '-vf', _shifted_subtitles_filter(subtitle_path, start),
+        '-c:v', 'libx264', '-preset', 'ultrafast',
+        '-c:a', 'aac',
+        output_path
+    ]
+    run_ffmpeg(command, job_id=job_id, duration=duration)
+    return output_path
+
+def render_preview_frames(video_path, subtitle_path, timestamps, output_prefix, job_id=None):
+    """Render one PNG still with subtitles at each timestamp."""
+    frame_paths = []
+    for index, timestamp in enumerate(timestamps):
+        frame_path = f"{output_prefix}_{index:03d}.png"
+        command = [
+            'ffmpeg', '-y',
+            '-ss', f"{timestamp:.6f}",
+            '-i', video_path,
+            '-frames:v', '1',
+            '-vf', _shifted_subtitles_filter(subtitle_path, timestamp),
+            frame_path
+        ]
+        run_ffmpeg(command, job_id=job_id)
+        frame_paths.append(frame_path)
+    return frame_paths
+
+def check_preview_range(preview, duration):
+    """Error message when the preview start or a timestamp is past the end of the video, else None."""
+    if duration is None:
+        return None
+    if preview.get('start', 0) >= duration:
+        return f"Preview start {preview['start']}s is past the end of the video ({duration:.2f}s)"
+    late = [timestamp for timestamp in preview.get('timestamps') or [] if timestamp >= duration]
+    if late:
+        return f"Preview timestamps {late} are past the end of the video ({duration:.2f}s)"
+    return None
+
+def render_preview(video_path, subtitle_path, preview, job_id, storage_path):
+    """
+    Render a caption preview: PNG frames when preview has 'timestamps', otherwise a
+    clip of preview['duration'] seconds starting at preview['start'].
+    Returns the output path, or a list of frame paths.
+    """
+    timestamps = preview.get('timestamps')
+    if timestamps:
+        output_prefix = os.path.join(storage_path, f"{job_id}_preview")
+        frame_paths = render_preview_frames(video_path, subtitle_path, timestamps, output_prefix, job_id)
+        logger.info(f"Job {job_id}: Rendered {len(frame_paths)} preview frames")
+        return frame_paths
+
+    start = preview.get('start', 0)
+    duration = preview.get('duration', DEFAULT_PREVIEW_SECONDS)
+    output_path = os.path.join(storage_path, f"{job_id}_preview.mp4")
+    render_preview_clip(video_path, subtitle_path, output_path, start, duration, job_id)
+    logger.info(f"Job {job_id}: Rendered {duration}s preview clip from {start}s")
+    return output_path
@@ -1,12 +1,21 @@
 import os
-import ffmpeg
 import logging
 import subprocess
-import whisper
 from datetime import timedelta
 import srt
 import re
 from services.file_management import download_file
+from services.whisper_toolkit import transcribe_media_file
+from services.font_index import get_available_fonts
+from services.ffprobe import get_video_resolution as probe_video_resolution, get_duration
+from services.ffmpeg_runner import run_ffmpeg
+from services.encoding_profiles import video_args, container_args
+from services.v1.video.caption_events import (
+    TextTransformer, format_ass_time, split_lines, classic_events, karaoke_events,
+    current_word_events, highlight_line_events, word_by_word_events, write_events
+)
+from services.v1.video.parallel_burn import burn_subtitles_parallel
+from services.v1.video.caption_preview import render_preview, check_preview_range
 from services.cloud_storage import upload_file  # Ensure this import is present
 import requests  # Ensure requests is imported for webhook handling
 from urllib.parse import urlparse
@@ -22,6 +31,12 @@ if not logger.hasHandlers():
 
 STORAGE_PATH = "/tmp/"
 
+# Subtitle codec used for soft subtitles in each output container; MP4 only carries mov_text
+SOFT_SUBTITLE_CODECS = {
+    "mp4": "mov_text",
+    "mkv": "ass"
+}
+
 POSITION_ALIGNMENT_MAP = {
     "bottom_left": 1,
     "bottom_center": 2,
@@ -47,14 +62,14 @@ def rgb_to_ass_color(rgb_color):
 
 def generate_transcription(video_path, language='auto'):
     try:
-        model = whisper.load_model("base")
-        transcription_options = {
-            'word_timestamps': True,
-            'verbose': True,
-        }
-        if language != 'auto':
-            transcription_options['language'] = language
-        result = model.transcribe(video_path, **transcription_options)
+        # Shares the transcription cache with /v1/media/transcribe
+        result, _ = transcribe_media_file(
+            video_path,
+            model_size="base",
+            language=language,
+            word_timestamps=True,
+            verbose=True
+        )
         logger.info(f"Transcription generated successfully for video: {video_path}")
         return result
     except Exception as e:
@@ -63,13 +78,10 @@ def generate_transcription(video_path, language='auto'):
 
 def get_video_resolution(video_path):
     try:
-        probe = ffmpeg.probe(video_path)
-        video_streams = [s for s in probe['streams'] if s['codec_type'] == 'video']
-        if video_streams:
-            width = int(video_streams[0]['width'])
-            height = int(video_streams[0]['height'])
-            logger.info(f"Video resolution determined: {width}x{height}")
-            return width, height
+        resolution = probe_video_resolution(video_path)
+        if resolution:
+            logger.info(f"Video resolution determined: {resolution[0]}x{resolution[1]}")
+            return resolution
         else:
             logger.warning(f"No video streams found for {video_path}. Using default resolution 384x288.")
             return 384, 288
@@ -77,33 +89,6 @@ def get_video_resolution(video_path):
         logger.error(f"Error getting video resolution: {str(e)}. Using default resolution 384x288.")
         return 384, 288
 
-def get_available_fonts():
-    """Get the list of available fonts on the system."""
-    try:
-        import matplotlib.font_manager as fm
-    except ImportError:
-        logger.error("matplotlib not installed. Install via 'pip install matplotlib'.")
-        return []
-    font_list = fm.findSystemFonts(fontpaths=None, fontext='ttf')
-    font_names = set()
-    for font in font_list:
-        try:
-            font_prop = fm.FontProperties(fname=font)
-            font_name = font_prop.get_name()
-            font_names.add(font_name)
-        except Exception:
-            continue
-    logger.info(f"Available fonts retrieved: {font_names}")
-    return list(font_names)
-
-def format_ass_time(seconds):
-    """Convert float seconds to ASS time format H:MM:SS.cc"""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    centiseconds = int(round((seconds - int(seconds)) * 100))
-    return f"{hours}:{minutes:02}:{secs:02}.{centiseconds:02}"
-
 def process_subtitle_text(text, replace_dict, all_caps, max_words_per_line):
     """Apply text transformations: replacements, all caps, and optional line splitting."""
     for old_word, new_word in replace_dict.items():
@@ -130,14 +115,6 @@ def srt_to_transcription_result(srt_content):
     logger.info("Converted SRT content to transcription result.")
     return {'segments': segments}
 
-def split_lines(text, max_words_per_line):
-    """Split text into multiple lines if max_words_per_line > 0."""
-    if max_words_per_line <= 0:
-        return [text]
-    words = text.split()
-    lines = [' '.join(words[i:i+max_words_per_line]) for i in range(0, len(words), max_words_per_line)]
-    return lines
-
 def is_url(string):
     """Check if the given string is a valid HTTP/HTTPS URL."""
     try:
@@ -316,17 +293,9 @@ def handle_classic(transcription_result, style_options, replace_dict, video_reso
 
     logger.info(f"[Classic] position={position_str}, alignment={alignment_str}, x={final_x}, y={final_y}, an_code={an_code}")
 
-    events = []
-    for segment in transcription_result['segments']:
-        text = segment['text'].strip().replace('\n', ' ')
-        lines = split_lines(text, max_words_per_line)
-        processed_text = '\\N'.join(process_subtitle_text(line, replace_dict, all_caps, 0) for line in lines)
-        start_time = format_ass_time(segment['start'])
-        end_time = format_ass_time(segment['end'])
-        position_tag = f"{{\\an{an_code}\\pos({final_x},{final_y})}}"
-        events.append(f"Dialogue: 0,{start_time},{end_time},Default,,0,0,0,,{position_tag}{processed_text}")
-    logger.info(f"Handled {len(events)} dialogues in classic style.")
-    return "\n".join(events)
+    position_tag = f"{{\\an{an_code}\\pos({final_x},{final_y})}}"
+    transform = TextTransformer(replace_dict, all_caps)
+    return classic_events(transcription_result['segments'], transform, position_tag, max_words_per_line)
 
 def handle_karaoke(transcription_result, style_options, replace_dict, video_resolution):
     """
@@ -351,44 +320,9 @@ def handle_karaoke(transcription_result, style_options, replace_dict, video_reso
 
     logger.info(f"[Karaoke] position={position_str}, alignment={alignment_str}, x={final_x}, y={final_y}, an_code={an_code}")
 
-    events = []
-    for segment in transcription_result['segments']:
-        words = segment.get('words', [])
-        if not words:
-            continue
-
-        if max_words_per_line > 0:
-            lines_content = []
-            current_line = []
-            current_line_words = 0
-            for w_info in words:
-                w = process_subtitle_text(w_info.get('word', ''), replace_dict, all_caps, 0)
-                duration_cs = int(round((w_info['end'] - w_info['start']) * 100))
-                highlighted_word = f"{{\\k{duration_cs}}}{w} "
-                current_line.append(highlighted_word)
-                current_line_words += 1
-                if current_line_words >= max_words_per_line:
-                    lines_content.append(''.join(current_line).strip())
-                    current_line = []
-                    current_line_words = 0
-            if current_line:
-                lines_content.append(''.join(current_line).strip())
-        else:
-            line_content = []
-            for w_info in words:
-                w = process_subtitle_text(w_info.get('word', ''), replace_dict, all_caps, 0)
-                duration_cs = int(round((w_info['end'] - w_info['start']) * 100))
-                highlighted_word = f"{{\\k{duration_cs}}}{w} "
-                line_content.append(highlighted_word)
-            lines_content = [''.join(line_content).strip()]
-
-        dialogue_text = '\\N'.join(lines_content)
-        start_time = format_ass_time(words[0]['start'])
-        end_time = format_ass_time(words[-1]['end'])
-        position_tag = f"{{\\an{an_code}\\pos({final_x},{final_y})}}"
-        events.append(f"Dialogue: 0,{start_time},{end_time},Default,,0,0,0,,{position_tag}{{\\c{word_color}}}{dialogue_text}")
-    logger.info(f"Handled {len(events)} dialogues in karaoke style.")
-    return "\n".join(events)
+    position_tag = f"{{\\an{an_code}\\pos({final_x},{final_y})}}"
+    transform = TextTransformer(replace_dict, all_caps)
+    return karaoke_events(transcription_result['segments'], transform, position_tag, max_words_per_line, word_color)
 
 def handle_highlight(transcription_result, style_options, replace_dict, video_resolution):
     """
@@ -412,43 +346,19 @@ def handle_highlight(transcription_result, style_options, replace_dict, video_re
 
     word_color = rgb_to_ass_color(style_options.get('word_color', '#FFFF00'))
     line_color = rgb_to_ass_color(style_options.get('line_color', '#FFFFFF'))
-    events = []
 
     logger.info(f"[Highlight] position={position_str}, alignment={alignment_str}, x={final_x}, y={final_y}, an_code={an_code}")
 
-    for segment in transcription_result['segments']:
-        words = segment.get('words', [])
-        if not words:
-            continue
-        processed_words = []
-        for w_info in words:
-            w = process_subtitle_text(w_info.get('word', ''), replace_dict, all_caps, 0)
-            if w:
-                processed_words.append((w, w_info['start'], w_info['end']))
-
-        if not processed_words:
-            continue
-
-        if max_words_per_line > 0:
-            line_sets = [processed_words[i:i+max_words_per_line] for i in range(0, len(processed_words), max_words_per_line)]
-        else:
-            line_sets = [processed_words]
-
-        for line_set in line_sets:
-            for idx, (word, w_start, w_end) in enumerate(line_set):
-                line_words = []
-                for w_idx, (w_text, _, _) in enumerate(line_set):
-                    if w_idx == idx:
-                        line_words.append(f"{{\\c{word_color}}}{w_text}{{\\c{line_color}}}")
-                    else:
-                        line_words.append(w_text)
-                full_text = ' '.join(line_words)
-                start_time = format_ass_time(w_start)
-                end_time = format_ass_time(w_end)
-                position_tag = f"{{\\an{an_code}\\pos({final_x},{final_y})}}"
-                events.append(f"Dialogue: 0,{start_time},{end_time},Default,,0,0,0,,{position_tag}{{\\c{line_color}}}{full_text}")
-    logger.info(f"Handled {len(events)} dialogues in highlight style.")
-    return "\n".join(events)
+    position_tag = f"{{\\an{an_code}\\pos({final_x},{final_y})}}"
+    transform = TextTransformer(replace_dict, all_caps)
+    if style_options.get('event_mode') == 'per_line':
+        return highlight_line_events(
+            transcription_result['segments'], transform, position_tag, max_words_per_line, line_color, word_color
+        )
+    return current_word_events(
+        transcription_result['segments'], transform, position_tag, max_words_per_line, line_color,
+        open_tag=f"{{\\c{word_color}}}", close_tag=f"{{\\c{line_color}}}"
+    )
 
 def handle_underline(transcription_result, style_options, replace_dict, video_resolution):
     """
@@ -470,43 +380,19 @@ def handle_underline(transcription_result, style_options, replace_dict, video_re
         video_height=video_resolution[1]
     )
     line_color = rgb_to_ass_color(style_options.get('line_color', '#FFFFFF'))
-    events = []
 
     logger.info(f"[Underline] position={position_str}, alignment={alignment_str}, x={final_x}, y={final_y}, an_code={an_code}")
 
-    for segment in transcription_result['segments']:
-        words = segment.get('words', [])
-        if not words:
-            continue
-        processed_words = []
-        for w_info in words:
-            w = process_subtitle_text(w_info.get('word', ''), replace_dict, all_caps, 0)
-            if w:
-                processed_words.append((w, w_info['start'], w_info['end']))
-
-        if not processed_words:
-            continue
-
-        if max_words_per_line > 0:
-            line_sets = [processed_words[i:i+max_words_per_line] for i in range(0, len(processed_words), max_words_per_line)]
-        else:
-            line_sets = [processed_words]
-
-        for line_set in line_sets:
-            for idx, (word, w_start, w_end) in enumerate(line_set):
-                line_words = []
-                for w_idx, (w_text, _, _) in enumerate(line_set):
-                    if w_idx == idx:
-                        line_words.append(f"{{\\u1}}{w_text}{{\\u0}}")
-                    else:
-                        line_words.append(w_text)
-                full_text = ' '.join(line_words)
-                start_time = format_ass_time(w_start)
-                end_time = format_ass_time(w_end)
-                position_tag = f"{{\\an{an_code}\\pos({final_x},{final_y})}}"
-                events.append(f"Dialogue: 0,{start_time},{end_time},Default,,0,0,0,,{position_tag}{{\\c{line_color}}}{full_text}")
-    logger.info(f"Handled {len(events)} dialogues in underline style.")
-    return "\n".join(events)
+    if style_options.get('event_mode') == 'per_line':
+        # \u cannot be animated with \t, so underline keeps one event per word
+        logger.warning("event_mode 'per_line' is not supported by the underline style; using 'per_word'.")
+
+    position_tag = f"{{\\an{an_code}\\pos({final_x},{final_y})}}"
+    transform = TextTransformer(replace_dict, all_caps)
+    return current_word_events(
+        transcription_result['segments'], transform, position_tag, max_words_per_line, line_color,
+        open_tag="{\\u1}", close_tag="{\\u0}"
+    )
 
 def handle_word_by_word(transcription_result, style_options, replace_dict, video_resolution):
     """
@@ -528,31 +414,12 @@ def handle_word_by_word(transcription_result, style_options, replace_dict, video
         video_height=video_resolution[1]
     )
     word_color = rgb_to_ass_color(style_options.get('word_color', '#FFFF00'))
-    events = []
 
     logger.info(f"[Word-by-Word] position={position_str}, alignment={alignment_str}, x={final_x}, y={final_y}, an_code={an_code}")
 
-    for segment in transcription_result['segments']:
-        words = segment.get('words', [])
-        if not words:
-            continue
-
-        if max_words_per_line > 0:
-            grouped_words = [words[i:i+max_words_per_line] for i in range(0, len(words), max_words_per_line)]
-        else:
-            grouped_words = [words]
-
-        for word_group in grouped_words:
-            for w_info in word_group:
-                w = process_subtitle_text(w_info.get('word', ''), replace_dict, all_caps, 0)
-                if not w:
-                    continue
-                start_time = format_ass_time(w_info['start'])
-                end_time = format_ass_time(w_info['end'])
-                position_tag = f"{{\\an{an_code}\\pos({final_x},{final_y})}}"
-                events.append(f"Dialogue: 0,{start_time},{end_time},Default,,0,0,0,,{position_tag}{{\\c{word_color}}}{w}")
-    logger.info(f"Handled {len(events)} dialogues in word-by-word style.")
-    return "\n".join(events)
+    position_tag = f"{{\\an{an_code}\\pos({final_x},{final_y})}}"
+    transform = TextTransformer(replace_dict, all_caps)
+    return word_by_word_events(transcription_result['segments'], transform, position_tag, word_color)
 
 STYLE_HANDLERS = {
     'classic': handle_classic,
@@ -562,37 +429,47 @@ STYLE_HANDLERS = {
     'word_by_word': handle_word_by_word
 }
 
-def srt_to_ass(transcription_result, style_type, settings, replace_dict, video_resolution):
-    """
-    Convert transcription result to ASS based on the specified style.
-    """
-    default_style_settings = {
-        'line_color': '#FFFFFF',
-        'word_color': '#FFFF00',
-        'box_color': '#000000',
-        'outline_color': '#000000',
-        'all_caps': False,
-        'max_words_per_line': 0,
-        'font_size': None,
-        'font_family': 'Arial',
-        'bold': False,
-        'italic': False,
-        'underline': False,
-        'strikeout': False,
-        'outline_width': 2,
-        'shadow_offset': 0,
-        'border_style': 1,
-        'x': None,
-        'y': None,
-        'position': 'middle_center',
-        'alignment': 'center'  # default alignment
-    }
-    style_options = {**default_style_settings, **settings}
+DEFAULT_STYLE_SETTINGS = {
+    'line_color': '#FFFFFF',
+    'word_color': '#FFFF00',
+    'box_color': '#000000',
+    'outline_color': '#000000',
+    'all_caps': False,
+    'max_words_per_line': 0,
+    'font_size': None,
+    'font_family': 'Arial',
+    'bold': False,
+    'italic': False,
+    'underline': False,
+    'strikeout': False,
+    'outline_width': 2,
+    'shadow_offset': 0,
+    'border_style': 1,
+    'x': None,
+    'y': None,
+    'position': 'middle_center',
+    'alignment': 'center',  # default alignment
+    'event_mode': 'per_word'
+}
+
+def resolve_style_options(settings, video_resolution):
+    """Merge caption settings over the style defaults for a video of the given resolution."""
+    style_options = {**DEFAULT_STYLE_SETTINGS, **settings}
 
     if style_options['font_size'] is None:
         style_options['font_size'] = int(video_resolution[1] * 0.05)
+    return style_options
+
+def prepare_ass(transcription_result, style_type, settings, replace_dict, video_resolution, ass_header=None):
+    """
+    Build the ASS header for the specified style and a lazy iterator over its Dialogue lines.
+    A header already generated for the same settings and resolution can be passed in.
+    Returns a dict with 'error' on font errors.
+    """
+    style_options = resolve_style_options(settings, video_resolution)
 
-    ass_header = generate_ass_header(style_options, video_resolution)
+    if ass_header is None:
+        ass_header = generate_ass_header(style_options, video_resolution)
     if isinstance(ass_header, dict) and 'error' in ass_header:
         # Font-related error
         return ass_header
@@ -602,45 +479,119 @@ def srt_to_ass(transcription_result, style_type, settings, replace_dict, video_r
         logger.warning(f"Unknown style '{style_type}', defaulting to 'classic'.")
         handler = handle_classic
 
-    dialogue_lines = handler(transcription_result, style_options, replace_dict, video_resolution)
+    return ass_header, handler(transcription_result, style_options, replace_dict, video_resolution)
+
+def srt_to_ass(transcription_result, style_type, settings, replace_dict, video_resolution):
+    """
+    Convert transcription result to ASS based on the specified style.
+    """
+    prepared = prepare_ass(transcription_result, style_type, settings, replace_dict, video_resolution)
+    if isinstance(prepared, dict):
+        return prepared
+    ass_header, events = prepared
+    dialogue_lines = "\n".join(events)
     logger.info("Converted transcription result to ASS format.")
     return ass_header + dialogue_lines + "\n"
 
+def write_ass_file(subtitle_path, transcription_result, style_type, settings, replace_dict, video_resolution, ass_header=None):
+    """
+    Stream the ASS subtitles for a transcription result straight to subtitle_path,
+    without holding the whole file in memory. Returns a dict with 'error' on font errors.
+    """
+    prepared = prepare_ass(transcription_result, style_type, settings, replace_dict, video_resolution, ass_header)
+    if isinstance(prepared, dict):
+        return prepared
+    ass_header, events = prepared
+    with open(subtitle_path, 'w', encoding='utf-8') as f:
+        f.write(ass_header)
+        count = write_events(f, events)
+    logger.info(f"Wrote {count} dialogues in {style_type} style to {subtitle_path}.")
+    return subtitle_path
+
 def process_subtitle_events(transcription_result, style_type, settings, replace_dict, video_resolution):
     """
     Process transcription results into ASS subtitle format.
     """
     return srt_to_ass(transcription_result, style_type, settings, replace_dict, video_resolution)
 
-def process_captioning_v1(video_url, captions, settings, replace, job_id, language='auto'):
+def mux_soft_subtitles(video_path, subtitle_path, output_path, output_format, job_id=None):
+    """
+    Add the subtitles as a selectable track instead of burning them in. Audio and video
+    are stream-copied, so this takes about as long as copying the file.
+    """
+    command = [
+        'ffmpeg', '-y',
+        '-i', video_path,
+        '-i', subtitle_path,
+        '-map', '0:v?', '-map', '0:a?', '-map', '1:0',
+        '-c', 'copy',
+        '-c:s', SOFT_SUBTITLE_CODECS[output_format],
+        output_path
+    ]
+    run_ffmpeg(command, job_id=job_id, duration=get_duration(video_path))
+
+def normalize_caption_options(settings, replace, job_id):
+    """
+    Validate and normalize caption settings and replace rules.
+    Returns (style_options, replace_dict), or a dict with 'error'.
+    """
+    if not isinstance(settings, dict):
+        logger.error(f"Job {job_id}: 'settings' should be a dictionary.")
+        return {"error": "'settings' should be a dictionary."}
+
+    # Normalize keys by replacing hyphens with underscores
+    style_options = {k.replace('-', '_'): v for k, v in settings.items()}
+
+    if not isinstance(replace, list):
+        logger.error(f"Job {job_id}: 'replace' should be a list of objects with 'find' and 'replace' keys.")
+        return {"error": "'replace' should be a list of objects with 'find' and 'replace' keys."}
+
+    # Convert 'replace' list to dictionary
+    replace_dict = {}
+    for item in replace:
+        if 'find' in item and 'replace' in item:
+            replace_dict[item['find']] = item['replace']
+        else:
+            logger.warning(f"Job {job_id}: Invalid replace item {item}. Skipping.")
+
+    # Handle deprecated 'highlight_color' by merging it into 'word_color'
+    if 'highlight_color' in style_options:
+        logger.warning(f"Job {job_id}: 'highlight_color' is deprecated; merging into 'word_color'.")
+        style_options['word_color'] = style_options.pop('highlight_color')
+
+    return style_options, replace_dict
+
+def burn_subtitles(video_path, subtitle_path, output_path, job_id=None, profile=None):
+    """
+    Burn subtitles into the video in a single ffmpeg pass with the given encoding profile;
+    the audio is copied. Raises CalledProcessError on failure.
+    """
+    command = [
+        'ffmpeg', '-y',
+        '-i', video_path,
+        '-vf', f"subtitles='{subtitle_path}'",
+        *video_args(profile),
+        '-c:a', 'copy',
+        *container_args(profile, output_path),
+        output_path
+    ]
+    run_ffmpeg(command, job_id=job_id, duration=get_duration(video_path))
+
+def process_captioning_v1(video_url, captions, settings, replace, job_id, language='auto', render='burn', output_format='mp4', parallel_segments=1, preview=None, profile=None):
     """
     Captioning process with transcription fallback and multiple styles.
     Integrates with the updated logic for positioning and alignment.
+    With render='soft' the subtitles are muxed as a track instead of burned in; with
+    parallel_segments > 1 the burn-in is split across that many ffmpeg processes.
+    Burned-in video is encoded with the named encoding profile (the server default if None).
+    A preview renders only a short window or a few frames; the transcript comes from the
+    transcription cache after the first request, so restyling a video is cheap.
     """
     try:
-        if not isinstance(settings, dict):
-            logger.error(f"Job {job_id}: 'settings' should be a dictionary.")
-            return {"error": "'settings' should be a dictionary."}
-
-        # Normalize keys by replacing hyphens with underscores
-        style_options = {k.replace('-', '_'): v for k, v in settings.items()}
-
-        if not isinstance(replace, list):
-            logger.error(f"Job {job_id}: 'replace' should be a list of objects with 'find' and 'replace' keys.")
-            return {"error": "'replace' should be a list of objects with 'find' and 'replace' keys."}
-
-        # Convert 'replace' list to dictionary
-        replace_dict = {}
-        for item in replace:
-            if 'find' in item and 'replace' in item:
-                replace_dict[item['find']] = item['replace']
-            else:
-                logger.warning(f"Job {job_id}: Invalid replace item {item}. Skipping.")
-
-        # Handle deprecated 'highlight_color' by merging it into 'word_color'
-        if 'highlight_color' in style_options:
-            logger.warning(f"Job {job_id}: 'highlight_color' is deprecated; merging into 'word_color'.")
-            style_options['word_color'] = style_options.pop('highlight_color')
+        normalized = normalize_caption_options(settings, replace, job_id)
+        if isinstance(normalized, dict):
+            return normalized
+        style_options, replace_dict = normalized
 
         # Check font availability
         font_family = style_options.get('font_family', 'Arial')
@@ -675,6 +626,13 @@ def process_captioning_v1(video_url, captions, settings, replace, job_id, langua
             # For non-font errors, do NOT include available_fonts
             return {"error": str(e)}
 
+        if preview is not None:
+            range_error = check_preview_range(preview, get_duration(video_path))
+            if range_error:
+                logger.error(f"Job {job_id}: {range_error}")
+                os.remove(video_path)
+                return {"error": range_error}
+
         # Get video resolution
         video_resolution = get_video_resolution(video_path)
         logger.info(f"Job {job_id}: Video resolution detected = {video_resolution[0]}x{video_resolution[1]}")
@@ -683,13 +641,17 @@ def process_captioning_v1(video_url, captions, settings, replace, job_id, langua
         style_type = style_options.get('style', 'classic').lower()
         logger.info(f"Job {job_id}: Using style '{style_type}' for captioning.")
 
+        subtitle_filename = f"{job_id}.ass"
+        subtitle_path = os.path.join(STORAGE_PATH, subtitle_filename)
+
         # Determine subtitle content
+        subtitle_content = None
+        transcription_result = None
         if captions_content:
             # Check if it's ASS by looking for '[Script Info]'
             if '[Script Info]' in captions_content:
                 # It's ASS directly
                 subtitle_content = captions_content
-                subtitle_type = 'ass'
                 logger.info(f"Job {job_id}: Detected ASS formatted captions.")
             else:
                 # Treat as SRT
@@ -700,53 +662,67 @@ def process_captioning_v1(video_url, captions, settings, replace, job_id, langua
                     logger.error(f"Job {job_id}: {error_message}")
                     return {"error": error_message}
                 transcription_result = srt_to_transcription_result(captions_content)
-                # Generate ASS based on chosen style
-                subtitle_content = process_subtitle_events(transcription_result, style_type, style_options, replace_dict, video_resolution)
-                subtitle_type = 'ass'
         else:
             # No captions provided, generate transcription
             logger.info(f"Job {job_id}: No captions provided, generating transcription.")
             transcription_result = generate_transcription(video_path, language=language)
-            # Generate ASS based on chosen style
-            subtitle_content = process_subtitle_events(transcription_result, style_type, style_options, replace_dict, video_resolution)
-            subtitle_type = 'ass'
-
-        # Check for subtitle processing errors
-        if isinstance(subtitle_content, dict) and 'error' in subtitle_content:
-            logger.error(f"Job {job_id}: {subtitle_content['error']}")
-            # Only include 'available_fonts' if it's a font-related error
-            if 'available_fonts' in subtitle_content:
-                return {"error": subtitle_content['error'], "available_fonts": subtitle_content.get('available_fonts', [])}
-            else:
-                return {"error": subtitle_content['error']}
 
         # Save the subtitle content
-        subtitle_filename = f"{job_id}.{subtitle_type}"
-        subtitle_path = os.path.join(STORAGE_PATH, subtitle_filename)
         try:
-            with open(subtitle_path, 'w', encoding='utf-8') as f:
-                f.write(subtitle_content)
+            if transcription_result is not None:
+                # Generate ASS based on chosen style, streamed to disk event by event
+                result = write_ass_file(subtitle_path, transcription_result, style_type, style_options, replace_dict, video_resolution)
+                # Check for subtitle processing errors
+                if isinstance(result, dict) and 'error' in result:
+                    logger.error(f"Job {job_id}: {result['error']}")
+                    # Only include 'available_fonts' if it's a font-related error
+                    if 'available_fonts' in result:
+                        return {"error": result['error'], "available_fonts": result.get('available_fonts', [])}
+                    else:
+                        return {"error": result['error']}
+            else:
+                with open(subtitle_path, 'w', encoding='utf-8') as f:
+                    f.write(subtitle_content)
             logger.info(f"Job {job_id}: Subtitle file saved to {subtitle_path}")
         except Exception as e:
             logger.error(f"Job {job_id}: Failed to save subtitle file: {str(e)}")
             return {"error": f"Failed to save subtitle file: {str(e)}"}
 
+        if preview is not None:
+            try:
+                return render_preview(video_path, subtitle_path, preview, job_id, STORAGE_PATH)
+            except subprocess.CalledProcessError as e:
+                logger.error(f"Job {job_id}: FFmpeg error: {e.stderr}")
+                return {"error": f"FFmpeg error: {e.stderr}"}
+
         # Prepare output filename and path
-        output_filename = f"{job_id}_captioned.mp4"
+        output_filename = f"{job_id}_captioned.{output_format}"
         output_path = os.path.join(STORAGE_PATH, output_filename)
 
+        if render == 'soft':
+            try:
+                mux_soft_subtitles(video_path, subtitle_path, output_path, output_format, job_id)
+                logger.info(f"Job {job_id}: Subtitle track muxed without re-encoding. Output saved to {output_path}")
+            except subprocess.CalledProcessError as e:
+                logger.error(f"Job {job_id}: FFmpeg error: {e.stderr}")
+                return {"error": f"FFmpeg error: {e.stderr}"}
+            return output_path
+
+        if parallel_segments > 1:
+            try:
+                if burn_subtitles_parallel(video_path, subtitle_path, output_path, parallel_segments, job_id, profile):
+                    return output_path
+            except subprocess.CalledProcessError as e:
+                logger.error(f"Job {job_id}: FFmpeg error: {e.stderr}")
+                return {"error": f"FFmpeg error: {e.stderr}"}
+
         # Process video with subtitles using FFmpeg
         try:
-            ffmpeg.input(video_path).output(
-                output_path,
-                vf=f"subtitles='{subtitle_path}'",
-                acodec='copy'
-            ).run(overwrite_output=True)
+            burn_subtitles(video_path, subtitle_path, output_path, job_id, profile)
             logger.info(f"Job {job_id}: FFmpeg processing completed. Output saved to {output_path}")
-        except ffmpeg.Error as e:
-            stderr_output = e.stderr.decode('utf8') if e.stderr else 'Unknown error'
-            logger.error(f"Job {job_id}: FFmpeg error: {stderr_output}")
-            return {"error": f"FFmpeg error: {stderr_output}"}
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Job {job_id}: FFmpeg error: {e.stderr}")
+            return {"error": f"FFmpeg error: {e.stderr}"}
 
         return output_path
 
@@ -0,0 +1,214 @@
+import os
+import logging
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from services.ffprobe import probe, find_video_stream, find_audio_stream, duration_of
+from services.ffmpeg_runner import run_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+# Clips re-encoded at the same time when inputs do not match
+CONCAT_NORMALIZE_WORKERS = int(os.environ.get('CONCAT_NORMALIZE_WORKERS', 2))
+
+VIDEO_ENCODERS = {
+    'h264': ('libx264', ['-preset', 'veryfast', '-crf', '18']),
+    'hevc': ('libx265', ['-preset', 'veryfast', '-crf', '20']),
+    'vp9': ('libvpx-vp9', ['-crf', '31', '-b:v', '0', '-row-mt', '1']),
+    'av1': ('libsvtav1', ['-preset', '8', '-crf', '30'])
+}
+# Audio codecs the MP4 output can carry; anything else (e.g. Vorbis) is transcoded to AAC
+AUDIO_ENCODERS = {
+    'aac': 'aac',
+    'mp3': 'libmp3lame',
+    'opus': 'libopus',
+    'ac3': 'ac3'
+}
+
+# Codecs carried as Annex B in MPEG-TS, with their parameter sets in band
+ANNEX_B_CODECS = ('h264', 'hevc')
+
+# Everything that has to be identical for video streams to be joined by stream copy
+VideoProfile = namedtuple(
+    'VideoProfile',
+    ['codec', 'profile', 'level', 'width', 'height', 'pix_fmt', 'frame_rate', 'time_base', 'sar', 'rotation']
+)
+
+def get_rotation(stream):
+    """Display rotation of a video stream in degrees (0, 90, 180 or 270)."""
+    for side_data in stream.get('side_data_list', []):
+        if 'rotation' in side_data:
+            return int(round(float(side_data['rotation']))) % 360
+    return int(stream.get('tags', {}).get('rotate', 0)) % 360
+
+def video_profile(stream):
+    """The VideoProfile of a video stream, or None without one."""
+    if not stream:
+        return None
+    annex_b = stream.get('codec_name') in ANNEX_B_CODECS
+    return VideoProfile(
+        codec=stream.get('codec_name'),
+        profile=stream.get('profile') if annex_b else None,
+        level=stream.get('level') if annex_b else None,
+        width=stream.get('width'), height=stream.get('height'),
+        pix_fmt=stream.get('pix_fmt'),
+        frame_rate=stream.get('r_frame_rate'),
+        time_base=stream.get('time_base'),
+        sar=stream.get('sample_aspect_ratio', '1:1'),
+        rotation=get_rotation(stream)
+    )
+
+def audio_profile(stream):
+    """(codec, sample rate, channels, channel layout) of an audio stream, or None without one."""
+    if not stream:
+        return None
+    return (
+        stream.get('codec_name'),
+        stream.get('sample_rate'),
+        stream.get('channels'),
+        stream.get('channel_layout')
+    )
+
+def probe_clip(path):
+    """
+    Video profile, audio profile and duration of a clip; `path` may also be a URL.
+    Everything comes from one probe, as URLs are not cached and each probe is a fetch.
+    """
+    data = probe(path)
+    return {
+        'video': video_profile(find_video_stream(data)),
+        'audio': audio_profile(find_audio_stream(data)),
+        'duration': duration_of(data) or 0.0
+    }
+
+def needs_normalizing(clip, target_video, target_audio):
+    return clip['video'] != target_video or clip['audio'] != target_audio
+
+def choose_target(clips):
+    """
+    The video and audio profiles covering the most seconds of input, so the fewest
+    seconds are re-encoded. Codecs without an encoder here are replaced by H.264/AAC.
+    The target is never rotated: rotation is container metadata that neither survives
+    the MPEG-TS join nor applies per clip, so rotated clips are re-encoded upright.
+    """
+    video_seconds = defaultdict(float)
+    audio_seconds = defaultdict(float)
+    for clip in clips:
+        video_seconds[clip['video']] += clip['duration']
+        if clip['audio']:
+            audio_seconds[clip['audio']] += clip['duration']
+
+    target_video = max(video_seconds, key=video_seconds.get)
+    if target_video.rotation in (90, 270):
+        target_video = target_video._replace(width=target_video.height, height=target_video.width)
+    target_video = target_video._replace(rotation=0)
+    if target_video.codec not in VIDEO_ENCODERS:
+        target_video = target_video._replace(codec='h264', profile='High', level=None, pix_fmt='yuv420p')
+
+    target_audio = max(audio_seconds, key=audio_seconds.get) if audio_seconds else None
+    if target_audio and target_audio[0] not in AUDIO_ENCODERS:
+        target_audio = ('aac',) + target_audio[1:]
+    return target_video, target_audio
+
+# Profiles accepted by libx264/libx265 -profile:v
+ENCODER_PROFILES = {'baseline', 'main', 'high', 'high10', 'high422', 'high444', 'main10'}
+
+def _encoder_profile(profile):
+    # ffprobe reports e.g. 'Constrained Baseline' or 'High 10'; encoders take 'baseline', 'high10'
+    if not profile:
+        return None
+    name = profile.lower().replace('constrained ', '').replace(' ', '')
+    return name if name in ENCODER_PROFILES else None
+
+def normalize_clip(input_path, output_path, clip, target_video, target_audio, threads):
+    """
+    Re-encode one clip to the target profiles so it can be joined by stream copy. ffmpeg
+    applies the clip's rotation while decoding, so the output is upright.
+    """
+    codec, profile, level, width, height, pix_fmt, frame_rate, time_base, sar, _ = target_video
+    encoder, encoder_args = VIDEO_ENCODERS[codec]
+
+    command = ['ffmpeg', '-y', '-i', input_path]
+    add_silence = target_audio is not None and clip['audio'] is None
+    if add_silence:
+        _, sample_rate, _, channel_layout = target_audio
+        command.extend([
+            '-f', 'lavfi', '-t', f"{clip['duration']:.6f}",
+            '-i', f"anullsrc=channel_layout={channel_layout or 'stereo'}:sample_rate={sample_rate}"
+        ])
+
+    command.extend([
+        '-map', '0:v:0',
+        '-vf', (
+            f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,"
+            f"setsar={sar.replace(':', '/')},fps={frame_rate},format={pix_fmt}"
+        ),
+        '-c:v', encoder, *encoder_args,
+        '-threads', str(threads)
+    ])
+    encoder_profile = _encoder_profile(profile)
+    if encoder_profile:
+        command.extend(['-profile:v', encoder_profile])
+    # ffprobe reports H.264 levels times 10 and HEVC levels times 30
+    if level and level > 0 and codec == 'h264':
+        command.extend(['-level:v', f"{level / 10:.1f}"])
+    elif level and level > 0 and codec == 'hevc':
+        command.extend(['-x265-params', f"level-idc={level / 30:.1f}"])
+    if time_base and '/' in time_base:
+        command.extend(['-video_track_timescale', time_base.split('/')[1]])
+
+    if target_audio is None:
+        command.append('-an')
+    else:
+        audio_codec, sample_rate, channels, _ = target_audio
+        command.extend([
+            '-map', '1:a:0' if add_silence else '0:a:0',
+            '-c:a', AUDIO_ENCODERS[audio_codec],
+            '-ar', str(sample_rate),
+            '-ac', str(channels)
+        ])
+        if add_silence:
+            command.append('-shortest')
+
+    command.append(output_path)
+    run_ffmpeg(command, duration=clip['duration'])
+
+def normalize_for_concat(input_files, created, job_id):
+    """
+    Probe all clips and return the files to join, the clip probes and the target video
+    and audio profiles. Clips that already match the dominant profile are used as they
+    are; only the others are re-encoded, in parallel, so the join itself can always
+    stream-copy. Re-encoded files are appended to `created` as they are started, so the
+    caller can remove them even if one fails.
+    """
+    clips = [probe_clip(path) for path in input_files]
+    missing_video = [path for path, clip in zip(input_files, clips) if clip['video'] is None]
+    if missing_video:
+        raise ValueError(f"Inputs without a video stream cannot be concatenated: {missing_video}")
+
+    # When only some clips have audio, silence is added to the others
+    target_video, target_audio = choose_target(clips)
+    mismatched = [index for index, clip in enumerate(clips) if needs_normalizing(clip, target_video, target_audio)]
+    if not mismatched:
+        logger.info(f"Job {job_id}: All {len(clips)} clips share one profile; joining by stream copy")
+        return list(input_files), clips, target_video, target_audio
+
+    logger.info(
+        f"Job {job_id}: Normalizing {len(mismatched)} of {len(clips)} clips to "
+        f"video {target_video}, audio {target_audio}"
+    )
+    workers = max(1, min(CONCAT_NORMALIZE_WORKERS, len(mismatched)))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    files = list(input_files)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for index in mismatched:
+            output_path = f"{os.path.splitext(input_files[index])[0]}_normalized.mp4"
+            created.append(output_path)
+            files[index] = output_path
+            futures.append(executor.submit(
+                normalize_clip, input_files[index], output_path, clips[index], target_video, target_audio, threads
+            ))
+        for future in futures:
+            future.result()
+    return files, clips, target_video, target_audio
@@ -0,0 +1,210 @@
+import os
+import logging
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from services.file_management import download_file
+from services.ffmpeg_runner import run_ffmpeg
+from services.v1.video.concat_normalize import ANNEX_B_CODECS, probe_clip, choose_target, needs_normalizing, normalize_clip
+
+logger = logging.getLogger(__name__)
+
+# URL schemes ffmpeg may open from a remote concat list; anything else is rejected up front
+CONCAT_REMOTE_PROTOCOLS = [
+    protocol.strip().lower()
+    for protocol in os.environ.get('CONCAT_REMOTE_PROTOCOLS', 'http,https').split(',')
+    if protocol.strip()
+]
+# Clips downloaded ahead of the one being joined in 'window' staging
+CONCAT_PREFETCH_WINDOW = int(os.environ.get('CONCAT_PREFETCH_WINDOW', 3))
+
+# ffprobe processes reading remote headers at once
+REMOTE_PROBE_WORKERS = 8
+
+def check_remote_urls(urls):
+    for url in urls:
+        scheme = urlparse(url).scheme.lower()
+        if scheme not in CONCAT_REMOTE_PROTOCOLS:
+            raise ValueError(
+                f"URL scheme '{scheme}' is not allowed for remote concatenation "
+                f"(allowed: {', '.join(CONCAT_REMOTE_PROTOCOLS)}): {url}"
+            )
+
+def _concat_entry(path):
+    # Single quotes are closed, escaped and reopened in ffconcat lists
+    escaped = path.replace("'", "'\\''")
+    return f"file '{escaped}'\n"
+
+def remove_files(paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+def concatenate_remote(urls, clips, output_path, list_path, job_id):
+    """
+    Join clips that share one profile by writing their URLs into the concat list, so
+    ffmpeg reads them over the network and nothing is staged on disk. Only for codecs
+    outside ANNEX_B_CODECS: the concat demuxer keeps the first clip's parameter sets.
+    """
+    with open(list_path, 'w') as f:
+        for url in urls:
+            f.write(_concat_entry(url))
+
+    # The list itself is a local file; tcp/tls carry http(s)
+    whitelist = ['file', 'tcp', 'tls'] + [p for p in CONCAT_REMOTE_PROTOCOLS if p not in ('file', 'tcp', 'tls')]
+    try:
+        run_ffmpeg([
+            'ffmpeg', '-y',
+            '-f', 'concat', '-safe', '0',
+            '-protocol_whitelist', ','.join(whitelist),
+            '-i', list_path,
+            '-map', '0:v:0', '-map', '0:a:0?',
+            '-c', 'copy',
+            output_path
+        ], job_id=job_id, duration=sum(clip['duration'] for clip in clips))
+    finally:
+        if os.path.exists(list_path):
+            os.remove(list_path)
+
+def join_through_mpegts(clip_files, durations, with_audio, output_path, job_id):
+    """
+    Join clips by stream copy through MPEG-TS: each clip is remuxed as MPEG-TS with its
+    timestamps shifted to its place in the output and piped into a single ffmpeg writing
+    the output. MPEG-TS carries H.264/HEVC as Annex B with the parameter sets in band, so
+    clips whose SPS/PPS differ still decode after the join, which an MP4 concat list
+    would not guarantee (it keeps only the first clip's avcC/hvcC).
+
+    `clip_files` yields one list of files per clip; the last file is joined, and all of
+    them are removed as soon as the clip has been remuxed.
+    """
+    read_fd, write_fd = os.pipe()
+    reader_errors = []
+
+    def read_output():
+        try:
+            run_ffmpeg([
+                'ffmpeg', '-y',
+                '-f', 'mpegts', '-i', 'pipe:0',
+                '-map', '0:v:0', '-map', '0:a:0?',
+                '-c', 'copy',
+                output_path
+            ], job_id=job_id, duration=sum(durations), stdin=read_fd)
+        except Exception as e:
+            reader_errors.append(e)
+        finally:
+            # Without a reader the clip writers fail with a broken pipe instead of blocking
+            os.close(read_fd)
+
+    reader = threading.Thread(target=read_output, daemon=True)
+    reader.start()
+
+    offset = 0.0
+    writer_error = None
+    try:
+        for files, duration in zip(clip_files, durations):
+            try:
+                command = ['ffmpeg', '-y', '-i', files[-1], '-map', '0:v:0']
+                command.extend(['-map', '0:a:0'] if with_audio else ['-an'])
+                command.extend([
+                    '-c', 'copy',
+                    '-output_ts_offset', f"{offset:.6f}",
+                    '-f', 'mpegts', f"pipe:{write_fd}"
+                ])
+                run_ffmpeg(command, pass_fds=(write_fd,))
+            finally:
+                remove_files(files)
+            offset += duration
+    except Exception as e:
+        writer_error = e
+    finally:
+        if hasattr(clip_files, 'close'):
+            # Stops a prefetching generator and removes what it fetched ahead
+            clip_files.close()
+        os.close(write_fd)
+        reader.join()
+
+    # A failed output ffmpeg also breaks the clip writers' pipe; its error is the real cause
+    if reader_errors:
+        raise reader_errors[0]
+    if writer_error:
+        raise writer_error
+
+def concatenate_windowed(urls, clips, target_video, target_audio, output_path, storage_path, job_id):
+    """
+    Join clips while holding at most CONCAT_PREFETCH_WINDOW of them on disk. Clips are
+    downloaded (and normalized when their profile differs) ahead of the join and joined
+    through MPEG-TS, see join_through_mpegts. Each clip is deleted as soon as it has
+    been remuxed.
+    """
+    window = max(1, CONCAT_PREFETCH_WINDOW)
+    threads = max(1, (os.cpu_count() or 1) // window)
+
+    def prepare(index):
+        files = [download_file(urls[index], storage_path)]
+        try:
+            if needs_normalizing(clips[index], target_video, target_audio):
+                files.append(f"{os.path.splitext(files[0])[0]}_normalized.mp4")
+                normalize_clip(files[0], files[1], clips[index], target_video, target_audio, threads)
+            return files
+        except Exception:
+            remove_files(files)
+            raise
+
+    def prefetched():
+        futures = {}
+        with ThreadPoolExecutor(max_workers=window) as executor:
+            try:
+                for index in range(min(window, len(urls))):
+                    futures[index] = executor.submit(prepare, index)
+
+                for index in range(len(urls)):
+                    files = futures.pop(index).result()
+                    if index + window < len(urls):
+                        futures[index + window] = executor.submit(prepare, index + window)
+                    yield files
+            finally:
+                for future in futures.values():
+                    future.cancel()
+                executor.shutdown(wait=True)
+                for future in futures.values():
+                    if future.done() and not future.cancelled() and future.exception() is None:
+                        remove_files(future.result())
+
+    join_through_mpegts(
+        prefetched(), [clip['duration'] for clip in clips], target_audio is not None, output_path, job_id
+    )
+    logger.info(f"Job {job_id}: Joined {len(urls)} clips with a prefetch window of {window}")
+
+def concatenate_without_staging(urls, output_path, storage_path, job_id, staging='remote'):
+    """
+    Concatenate remote clips with bounded scratch disk. All clips are probed over the
+    network first; with staging='remote' clips sharing one profile are read by ffmpeg
+    straight from their URLs, H.264/HEVC ones joined through MPEG-TS. With staging='window', or when some clips have to be
+    normalized, clips are fetched through a sliding prefetch window instead.
+    """
+    check_remote_urls(urls)
+    with ThreadPoolExecutor(max_workers=REMOTE_PROBE_WORKERS) as executor:
+        clips = list(executor.map(probe_clip, urls))
+    missing_video = [url for url, clip in zip(urls, clips) if clip['video'] is None]
+    if missing_video:
+        raise ValueError(f"Inputs without a video stream cannot be concatenated: {missing_video}")
+
+    target_video, target_audio = choose_target(clips)
+    mismatched = sum(1 for clip in clips if needs_normalizing(clip, target_video, target_audio))
+
+    if staging == 'remote' and not mismatched:
+        logger.info(f"Job {job_id}: Joining {len(urls)} clips directly from their URLs")
+        if target_video.codec in ANNEX_B_CODECS:
+            # Each URL is remuxed as it is read; there are no local files to remove
+            join_through_mpegts(
+                [[url] for url in urls], [clip['duration'] for clip in clips],
+                target_audio is not None, output_path, job_id
+            )
+        else:
+            concatenate_remote(urls, clips, output_path, os.path.join(storage_path, f"{job_id}_concat_list.txt"), job_id)
+        return output_path
+
+    if staging == 'remote':
+        logger.info(f"Job {job_id}: {mismatched} clips need normalizing; using the prefetch window instead")
+    concatenate_windowed(urls, clips, target_video, target_audio, output_path, storage_path, job_id)
+    return output_path
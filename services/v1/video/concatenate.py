@@ -1,17 +1,32 @@
 import os
-import ffmpeg
-import requests
 from services.file_management import download_file
+from services.ffmpeg_runner import run_ffmpeg
+from services.v1.video.concat_normalize import normalize_for_concat, ANNEX_B_CODECS
+from services.v1.video.concat_streaming import concatenate_without_staging, join_through_mpegts
 
 # Set the default local storage directory
 STORAGE_PATH = "/tmp/"
 
-def process_video_concatenate(media_urls, job_id, webhook_url=None):
-    """Combine multiple videos into one."""
+def process_video_concatenate(media_urls, job_id, webhook_url=None, staging='download'):
+    """
+    Combine multiple videos into one. Inputs are probed first: when they share codec,
+    resolution, frame rate and timebase they are joined by stream copy; otherwise only
+    the mismatched clips are re-encoded to the common profile before the copy join.
+    H.264/HEVC clips are joined through MPEG-TS so each clip keeps its own parameter sets.
+    With staging='remote' or 'window' the clips are not all downloaded up front, see
+    concatenate_without_staging.
+    """
     input_files = []
+    normalized_files = []
     output_filename = f"{job_id}.mp4"
     output_path = os.path.join(STORAGE_PATH, output_filename)
 
+    if staging != 'download':
+        urls = [media_item['video_url'] for media_item in media_urls]
+        return concatenate_without_staging(urls, output_path, STORAGE_PATH, job_id, staging)
+
+    concat_file_path = os.path.join(STORAGE_PATH, f"{job_id}_concat_list.txt")
+
     try:
         # Download all media files
         for i, media_item in enumerate(media_urls):
@@ -19,25 +34,28 @@ def process_video_concatenate(media_urls, job_id, webhook_url=None):
             input_filename = download_file(url, os.path.join(STORAGE_PATH, f"{job_id}_input_{i}"))
             input_files.append(input_filename)
 
-        # Generate an absolute path concat list file for FFmpeg
-        concat_file_path = os.path.join(STORAGE_PATH, f"{job_id}_concat_list.txt")
-        with open(concat_file_path, 'w') as concat_file:
-            for input_file in input_files:
-                # Write absolute paths to the concat list
-                concat_file.write(f"file '{os.path.abspath(input_file)}'\n")
-
-        # Use the concat demuxer to concatenate the videos
-        (
-            ffmpeg.input(concat_file_path, format='concat', safe=0).
-                output(output_path, c='copy').
-                run(overwrite_output=True)
-        )
-
-        # Clean up input files
-        for f in input_files:
-            os.remove(f)
-            
-        os.remove(concat_file_path)  # Remove the concat list file after the operation
+        concat_files, clips, target_video, target_audio = normalize_for_concat(input_files, normalized_files, job_id)
+
+        if target_video.codec in ANNEX_B_CODECS:
+            join_through_mpegts(
+                ([path] for path in concat_files), [clip['duration'] for clip in clips],
+                target_audio is not None, output_path, job_id
+            )
+        else:
+            # Generate an absolute path concat list file for FFmpeg
+            with open(concat_file_path, 'w') as concat_file:
+                for concat_input in concat_files:
+                    # Write absolute paths to the concat list
+                    concat_file.write(f"file '{os.path.abspath(concat_input)}'\n")
+
+            # Use the concat demuxer to concatenate the videos
+            run_ffmpeg([
+                'ffmpeg', '-y',
+                '-f', 'concat', '-safe', '0', '-i', concat_file_path,
+                '-map', '0:v:0', '-map', '0:a:0?',
+                '-c', 'copy',
+                output_path
+            ], job_id=job_id)
 
         print(f"Video combination successful: {output_path}")
 
@@ -48,4 +66,9 @@ def process_video_concatenate(media_urls, job_id, webhook_url=None):
         return output_path
     except Exception as e:
         print(f"Video combination failed: {str(e)}")
-        raise 
+        raise
+    finally:
+        # Clean up input files, normalized copies and the concat list
+        for path in input_files + normalized_files + [concat_file_path]:
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,121 @@
+import os
+import logging
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from services.ffprobe import get_duration, get_start_time, get_video_offset
+from services.ffmpeg_runner import run_ffmpeg
+from services.encoding_profiles import video_args, container_args
+
+logger = logging.getLogger(__name__)
+
+# Ranges shorter than this are not worth a separate ffmpeg process
+MIN_SEGMENT_SECONDS = 10
+
+def get_keyframe_times(video_path):
+    """
+    Keyframe timestamps of the first video stream, relative to the start of the file.
+    Reads packet flags only, so nothing is decoded.
+    """
+    result = subprocess.run([
+        'ffprobe', '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time,flags',
+        '-of', 'csv=p=0',
+        video_path
+    ], check=True, capture_output=True, text=True)
+    start_time = get_start_time(video_path)
+    times = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(',')
+        if 'K' in flags and pts_time not in ('', 'N/A'):
+            times.append(float(pts_time) - start_time)
+    return sorted(times)
+
+def plan_segments(keyframe_times, duration, count):
+    """
+    Split [0, duration) into up to `count` ranges whose boundaries are keyframes,
+    so every range can be decoded independently and starts exactly where the previous ends.
+    """
+    boundaries = [0.0]
+    for i in range(1, count):
+        target = duration * i / count
+        candidates = [t for t in keyframe_times if t >= target and t - boundaries[-1] >= MIN_SEGMENT_SECONDS]
+        if candidates and duration - candidates[0] >= MIN_SEGMENT_SECONDS:
+            boundaries.append(candidates[0])
+    boundaries.append(duration)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+def burn_range(video_path, subtitle_path, segment_path, start, end, threads, profile=None):
+    """
+    Burn subtitles into one keyframe-aligned range, video only. Input seeking resets the
+    range's timestamps to zero, so they are shifted back by `start` around the subtitles
+    filter to render the same events the single-pass burn shows at that point.
+    """
+    command = [
+        'ffmpeg', '-y',
+        '-ss', f"{start:.6f}",
+        '-i', video_path,
+        '-t', f"{end - start:.6f}",
+        '-map', '0:v:0',
+        '-vf', f"setpts=PTS+{start:.6f}/TB,subtitles='{subtitle_path}',setpts=PTS-STARTPTS",
+        *video_args(profile, threads=threads),
+        '-an', '-sn',
+        segment_path
+    ]
+    # Progress of the ranges would interleave in the job status; only the totals are recorded
+    run_ffmpeg(command)
+
+def burn_subtitles_parallel(video_path, subtitle_path, output_path, segments, job_id, profile=None):
+    """
+    Burn subtitles with `segments` ffmpeg processes working on separate keyframe-aligned
+    time ranges, then join the ranges with the concat demuxer without re-encoding.
+    The original default audio is stream-copied over the joined video, as in the
+    single-pass burn, so A/V sync does not depend on the split. The ranges start at zero,
+    so the joined video is shifted back to the video stream's offset from the file start.
+
+    Returns False when the video is too short to split, so the caller can fall back to
+    the single-pass burn.
+    """
+    duration = get_duration(video_path)
+    ranges = plan_segments(get_keyframe_times(video_path), duration, segments) if duration else []
+    if len(ranges) < 2:
+        logger.info(f"Job {job_id}: Video too short or too few keyframes to split; using single-pass burn-in")
+        return False
+
+    extension = os.path.splitext(output_path)[1]
+    base_path = os.path.splitext(output_path)[0]
+    segment_paths = [f"{base_path}_part{i:03d}{extension}" for i in range(len(ranges))]
+    list_path = f"{base_path}_parts.txt"
+    threads = max(1, (os.cpu_count() or 1) // len(ranges))
+    video_offset = get_video_offset(video_path)
+
+    try:
+        logger.info(f"Job {job_id}: Burning subtitles into {len(ranges)} ranges in parallel: {ranges}")
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            futures = [
+                executor.submit(burn_range, video_path, subtitle_path, segment_path, start, end, threads, profile)
+                for segment_path, (start, end) in zip(segment_paths, ranges)
+            ]
+            for future in futures:
+                future.result()
+
+        with open(list_path, 'w') as f:
+            for segment_path in segment_paths:
+                f.write(f"file '{os.path.abspath(segment_path)}'\n")
+
+        run_ffmpeg([
+            'ffmpeg', '-y',
+            '-itsoffset', f"{video_offset:.6f}",
+            '-f', 'concat', '-safe', '0', '-i', list_path,
+            '-i', video_path,
+            '-map', '0:v:0', '-map', '1:a:0?',
+            '-c', 'copy',
+            *container_args(profile, output_path),
+            output_path
+        ], job_id=job_id, duration=duration)
+        logger.info(f"Job {job_id}: Joined {len(ranges)} burned ranges into {output_path}")
+        return True
+    finally:
+        for path in segment_paths + [list_path]:
+            if os.path.exists(path):
+                os.remove(path)
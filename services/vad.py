@@ -0,0 +1,127 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Whisper decodes all media to 16 kHz mono float32 PCM
+SAMPLE_RATE = 16000
+
+def detect_speech_regions(audio, sample_rate=SAMPLE_RATE, frame_ms=30, margin_db=10.0, floor_db=-60.0,
+                          min_speech_ms=250, min_silence_ms=1000, padding_ms=200):
+    """
+    Energy-based voice activity detection over decoded PCM.
+    Returns a list of (start_sample, end_sample) tuples covering the speech regions.
+    """
+    frame_size = int(sample_rate * frame_ms / 1000)
+    num_frames = len(audio) // frame_size
+    if num_frames == 0:
+        return [(0, len(audio))] if len(audio) else []
+
+    # Per-frame energy in dB, computed over a (frames, samples) view of the signal
+    frames = audio[:num_frames * frame_size].reshape(num_frames, frame_size)
+    energy_db = 10 * np.log10(np.mean(np.square(frames, dtype=np.float64), axis=1) + 1e-10)
+
+    # Adaptive threshold: a margin above the estimated noise floor, never below the absolute floor
+    noise_floor_db = np.percentile(energy_db, 10)
+    threshold_db = max(noise_floor_db + margin_db, floor_db)
+    speech = energy_db > threshold_db
+
+    # Drop speech bursts that are too short to be words (clicks, pops)
+    min_speech_frames = max(1, int(min_speech_ms / frame_ms))
+    speech = _fill_short_runs(speech, value=True, min_length=min_speech_frames)
+
+    # Pad every speech region so word onsets and tails are not clipped
+    padding_frames = int(padding_ms / frame_ms)
+    if padding_frames > 0 and speech.any():
+        kernel = np.ones(2 * padding_frames + 1, dtype=np.int32)
+        dilated = np.convolve(speech.astype(np.int32), kernel, mode='full')
+        speech = dilated[padding_frames:padding_frames + num_frames] > 0
+
+    # Only skip silences long enough to be worth cutting; keep short pauses for Whisper's context
+    min_silence_frames = max(1, int(min_silence_ms / frame_ms))
+    speech = _fill_short_runs(speech, value=False, min_length=min_silence_frames)
+
+    starts, ends = _runs(speech)
+    regions = []
+    for start, end in zip(starts, ends):
+        start_sample = int(start) * frame_size
+        # Let the last region extend over the trailing partial frame
+        end_sample = len(audio) if end == num_frames else int(end) * frame_size
+        regions.append((start_sample, end_sample))
+
+    logger.info(f"VAD threshold {threshold_db:.1f} dB, found {len(regions)} speech region(s)")
+    return regions
+
+def _runs(mask):
+    """Return start and end (exclusive) indices of the True runs in a boolean array."""
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    changes = np.diff(padded)
+    return np.flatnonzero(changes == 1), np.flatnonzero(changes == -1)
+
+def _fill_short_runs(mask, value, min_length):
+    """Flip runs equal to `value` that are shorter than `min_length` frames."""
+    mask = mask.copy()
+    starts, ends = _runs(mask == value)
+    for start, end in zip(starts, ends):
+        # Leading and trailing silences are always worth skipping, whatever their length
+        if not value and (start == 0 or end == len(mask)):
+            continue
+        if end - start < min_length:
+            mask[start:end] = not value
+    return mask
+
+def apply_vad(audio, sample_rate=SAMPLE_RATE, **vad_options):
+    """
+    Remove non-speech regions from the audio.
+    Returns the condensed audio, a timestamp map back to the original timeline and skip statistics.
+    """
+    regions = detect_speech_regions(audio, sample_rate=sample_rate, **vad_options)
+
+    condensed_starts = []
+    original_starts = []
+    position = 0
+    for start, end in regions:
+        condensed_starts.append(position / sample_rate)
+        original_starts.append(start / sample_rate)
+        position += end - start
+
+    if regions:
+        speech_audio = np.concatenate([audio[start:end] for start, end in regions])
+    else:
+        speech_audio = np.zeros(0, dtype=audio.dtype)
+
+    time_map = {
+        'condensed_starts': np.array(condensed_starts, dtype=np.float64),
+        'original_starts': np.array(original_starts, dtype=np.float64)
+    }
+
+    original_duration = len(audio) / sample_rate
+    speech_duration = len(speech_audio) / sample_rate
+    stats = {
+        'original_duration': round(original_duration, 3),
+        'speech_duration': round(speech_duration, 3),
+        'skipped_duration': round(original_duration - speech_duration, 3),
+        'speech_regions': len(regions)
+    }
+    logger.info(f"VAD skipped {stats['skipped_duration']}s of {stats['original_duration']}s")
+    return speech_audio, time_map, stats
+
+def map_time(t, time_map, is_end=False):
+    """Map a timestamp on the condensed timeline back to the original timeline."""
+    condensed_starts = time_map['condensed_starts']
+    if len(condensed_starts) == 0:
+        return t
+    # An end time that lands exactly on a cut belongs to the region before the cut
+    side = 'left' if is_end else 'right'
+    index = max(int(np.searchsorted(condensed_starts, t, side=side)) - 1, 0)
+    return float(time_map['original_starts'][index] + (t - condensed_starts[index]))
+
+def remap_transcription(result, time_map):
+    """Rewrite segment and word timestamps of a Whisper result onto the original timeline."""
+    for segment in result.get('segments', []):
+        segment['start'] = round(map_time(segment['start'], time_map), 3)
+        segment['end'] = round(map_time(segment['end'], time_map, is_end=True), 3)
+        for word in segment.get('words', []) or []:
+            word['start'] = round(map_time(word['start'], time_map), 3)
+            word['end'] = round(map_time(word['end'], time_map, is_end=True), 3)
+    return result
@@ -0,0 +1,177 @@
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+import torch
+import whisper
+
+logger = logging.getLogger(__name__)
+
+# Clips arriving within this window are decoded together; 0 disables batching
+WHISPER_BATCH_WINDOW_MS = int(os.environ.get('WHISPER_BATCH_WINDOW_MS', 100))
+WHISPER_MAX_BATCH_SIZE = int(os.environ.get('WHISPER_MAX_BATCH_SIZE', 16))
+
+# Only clips that fit in a single Whisper window can be decoded in one batched pass
+MAX_BATCH_CLIP_SECONDS = whisper.audio.CHUNK_LENGTH
+
+# Same quality gates whisper.transcribe uses to trigger its temperature fallback
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+
+class WhisperBatcher:
+    """
+    Micro-batching scheduler in front of a Whisper model.
+    Short clips submitted within a small window are decoded as one batch and the
+    results are fanned back out to the waiting jobs. `lock` is the model's inference
+    lock, held for each decode so the batcher never runs alongside other callers.
+    """
+    def __init__(self, model, lock=None, window_ms=WHISPER_BATCH_WINDOW_MS, max_batch_size=WHISPER_MAX_BATCH_SIZE):
+        self.model = model
+        self.lock = lock or threading.Lock()
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.pending = queue.Queue()
+        self.stats_lock = threading.Lock()
+        self.stats = {'batches': 0, 'clips': 0, 'fallbacks': 0, 'decode_time': 0.0}
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, audio, task='transcribe', language=None):
+        """Queue a clip for batched decoding; returns a Future resolving to a Whisper-style result."""
+        future = Future()
+        self.pending.put((audio, task, language, future))
+        return future
+
+    def get_stats(self):
+        with self.stats_lock:
+            stats = dict(self.stats)
+        stats['average_batch_size'] = round(stats['clips'] / stats['batches'], 2) if stats['batches'] else 0
+        return stats
+
+    def _run(self):
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.time() + self.window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Clips can only share a decode pass when they share decoding options
+            groups = {}
+            for item in batch:
+                groups.setdefault((item[1], item[2]), []).append(item)
+            for (task, language), items in groups.items():
+                self._decode_group(items, task, language)
+
+    def _decode_group(self, items, task, language):
+        start_time = time.time()
+        try:
+            mel = torch.stack([
+                whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), self.model.dims.n_mels)
+                for audio, _, _, _ in items
+            ]).to(self.model.device)
+            options = whisper.DecodingOptions(
+                task=task,
+                language=language,
+                fp16=self.model.device.type != 'cpu'
+            )
+            with self.lock:
+                decoded = whisper.decode(self.model, mel, options)
+        except Exception as e:
+            logger.error(f"Batched decode of {len(items)} clip(s) failed: {e}")
+            for _, _, _, future in items:
+                future.set_exception(e)
+            return
+
+        fallbacks = 0
+        for (audio, _, _, future), result in zip(items, decoded):
+            try:
+                if (result.compression_ratio > COMPRESSION_RATIO_THRESHOLD
+                        or result.avg_logprob < LOGPROB_THRESHOLD):
+                    # Let the unbatched path retry with its temperature fallback
+                    fallbacks += 1
+                    options = {'task': task, 'verbose': None}
+                    if language:
+                        options['language'] = language
+                    with self.lock:
+                        transcription = self.model.transcribe(audio, **options)
+                    future.set_result(transcription)
+                else:
+                    future.set_result(self._to_transcription(result, len(audio) / whisper.audio.SAMPLE_RATE, task))
+            except Exception as e:
+                future.set_exception(e)
+
+        with self.stats_lock:
+            self.stats['batches'] += 1
+            self.stats['clips'] += len(items)
+            self.stats['fallbacks'] += fallbacks
+            self.stats['decode_time'] += time.time() - start_time
+        logger.info(f"Decoded batch of {len(items)} clip(s) in {time.time() - start_time:.2f}s")
+
+    def _to_transcription(self, result, duration, task):
+        """Convert a DecodingResult into the dict shape returned by model.transcribe."""
+        tokenizer = whisper.tokenizer.get_tokenizer(
+            self.model.is_multilingual,
+            num_languages=self.model.num_languages,
+            language=result.language,
+            task=task
+        )
+        time_precision = whisper.audio.CHUNK_LENGTH / self.model.dims.n_audio_ctx
+
+        segments = []
+        segment_start = None
+        text_tokens = []
+
+        def add_segment(end):
+            segments.append({
+                'id': len(segments),
+                'seek': 0,
+                'start': round(segment_start or 0.0, 2),
+                'end': round(min(end, duration), 2),
+                'text': tokenizer.decode(text_tokens),
+                'tokens': list(text_tokens),
+                'temperature': result.temperature,
+                'avg_logprob': result.avg_logprob,
+                'compression_ratio': result.compression_ratio,
+                'no_speech_prob': result.no_speech_prob
+            })
+
+        for token in result.tokens:
+            if token >= tokenizer.timestamp_begin:
+                timestamp = (token - tokenizer.timestamp_begin) * time_precision
+                if segment_start is not None and text_tokens:
+                    add_segment(timestamp)
+                    text_tokens = []
+                    segment_start = None
+                else:
+                    segment_start = timestamp
+            else:
+                text_tokens.append(token)
+        if text_tokens:
+            add_segment(duration)
+
+        return {'text': result.text, 'segments': segments, 'language': result.language}
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+def get_batcher(model_size, model, lock=None):
+    with _batchers_lock:
+        if model_size not in _batchers:
+            _batchers[model_size] = WhisperBatcher(model, lock)
+        return _batchers[model_size]
+
+def get_batcher_stats():
+    with _batchers_lock:
+        return {model_size: batcher.get_stats() for model_size, batcher in _batchers.items()}
+
+def can_batch(audio, word_timestamps):
+    """Batching covers short clips without word-level timestamps."""
+    return (WHISPER_BATCH_WINDOW_MS > 0 and not word_timestamps
+            and len(audio) <= MAX_BATCH_CLIP_SECONDS * whisper.audio.SAMPLE_RATE)
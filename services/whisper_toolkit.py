@@ -0,0 +1,216 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+import torch
+import whisper
+from services.vad import apply_vad, remap_transcription
+from services.whisper_batcher import get_batcher, can_batch
+
+logger = logging.getLogger(__name__)
+
+# Set to "int8" to run the Whisper models with int8 dynamic quantization on CPU
+WHISPER_QUANTIZATION = os.environ.get('WHISPER_QUANTIZATION', 'none').lower()
+
+# On-disk transcription cache shared by every endpoint that needs a transcript
+TRANSCRIPTION_CACHE_DIR = os.environ.get('TRANSCRIPTION_CACHE_DIR', '/tmp/transcription_cache')
+TRANSCRIPTION_CACHE_MAX_BYTES = int(os.environ.get('TRANSCRIPTION_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+_cache_lock = threading.Lock()
+
+# Models are loaded once per worker process and shared by every job. Whisper installs its
+# KV-cache hooks on the shared decoder modules for each decode, so two inference calls on
+# one model would overwrite each other's caches: every call holds the model's lock.
+_models = {}
+_model_locks = {}
+_models_lock = threading.Lock()
+
+def get_model(model_size, quantization=None):
+    quantization = quantization or WHISPER_QUANTIZATION
+    with _models_lock:
+        if (model_size, quantization) not in _models:
+            if quantization == 'int8':
+                model = quantize_model(whisper.load_model(model_size, device='cpu'))
+            else:
+                model = whisper.load_model(model_size)
+            _models[(model_size, quantization)] = model
+            _model_locks[(model_size, quantization)] = threading.Lock()
+            logger.info(f"Loaded Whisper {model_size} model (quantization: {quantization})")
+        return _models[(model_size, quantization)]
+
+def get_model_lock(model_size, quantization=None):
+    """Lock to hold for every inference call on the model returned by get_model."""
+    quantization = quantization or WHISPER_QUANTIZATION
+    get_model(model_size, quantization)
+    with _models_lock:
+        return _model_locks[(model_size, quantization)]
+
+def quantize_model(model):
+    """Apply int8 dynamic quantization to the Linear layers of a CPU Whisper model."""
+    # Whisper subclasses nn.Linear only to cast weights to the input dtype, which is a no-op
+    # in float32 on CPU. quantize_dynamic matches exact types, so expose them as plain Linear.
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear) and type(module) is not torch.nn.Linear:
+            module.__class__ = torch.nn.Linear
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+def hash_audio(audio):
+    """
+    SHA-256 of the decoded 16 kHz mono PCM that Whisper transcribes. Endpoints decoding
+    the same audio through the same ffmpeg conversion share entries whatever the
+    container; any change to the audio gives another key.
+    """
+    return hashlib.sha256(audio.tobytes()).hexdigest()
+
+def get_cache_key(audio_hash, model_size, task, language, word_timestamps, vad):
+    key_parts = [audio_hash, model_size, WHISPER_QUANTIZATION, task, language or 'auto', str(bool(word_timestamps)), str(bool(vad))]
+    return hashlib.sha256('|'.join(key_parts).encode('utf-8')).hexdigest()
+
+def without_word_timestamps(result):
+    """Copy of a word-timestamp result shaped like one transcribed without them."""
+    result = dict(result)
+    result['segments'] = [
+        {key: value for key, value in segment.items() if key != 'words'}
+        for segment in result.get('segments', [])
+    ]
+    return result
+
+def get_entry_path(cache_key):
+    # The key names the entry file, so a lookup opens one file instead of scanning the cache
+    return os.path.join(TRANSCRIPTION_CACHE_DIR, f"{cache_key}.json")
+
+def find_cached_transcription(cache_key):
+    """Return the cached entry for the key, marking it as recently used."""
+    if TRANSCRIPTION_CACHE_MAX_BYTES <= 0:
+        return None
+    entry_path = get_entry_path(cache_key)
+    try:
+        with open(entry_path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+        # The mtime of the entry is the LRU clock
+        os.utime(entry_path, None)
+        return entry
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Discarding unreadable transcription cache entry {entry_path}: {e}")
+        _remove_entry(entry_path)
+        return None
+
+def store_cached_transcription(cache_key, entry):
+    """Write an entry atomically and evict least recently used entries over the size limit."""
+    if TRANSCRIPTION_CACHE_MAX_BYTES <= 0:
+        return
+    try:
+        os.makedirs(TRANSCRIPTION_CACHE_DIR, exist_ok=True)
+        entry_path = get_entry_path(cache_key)
+        temp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, default=_json_default)
+        os.replace(temp_path, entry_path)
+        evict_transcription_cache()
+    except OSError as e:
+        logger.warning(f"Failed to store transcription cache entry: {e}")
+
+def _remove_entry(entry_path):
+    try:
+        os.remove(entry_path)
+    except OSError:
+        pass
+
+def evict_transcription_cache():
+    with _cache_lock:
+        entries = []
+        total_size = 0
+        for filename in os.listdir(TRANSCRIPTION_CACHE_DIR):
+            if not filename.endswith('.json'):
+                continue
+            entry_path = os.path.join(TRANSCRIPTION_CACHE_DIR, filename)
+            try:
+                stat = os.stat(entry_path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+            total_size += stat.st_size
+
+        entries.sort()
+        for _, size, entry_path in entries:
+            if total_size <= TRANSCRIPTION_CACHE_MAX_BYTES:
+                break
+            _remove_entry(entry_path)
+            total_size -= size
+            logger.info(f"Evicted transcription cache entry {entry_path}")
+
+def _json_default(value):
+    # Whisper results can carry NumPy scalars
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+def transcribe_media_file(media_path, model_size='base', task='transcribe', language=None,
+                          word_timestamps=False, vad=False, verbose=False):
+    """
+    Transcribe a local media file with Whisper, reusing a cached result when the same audio
+    was already transcribed with the same model, language, task and word_timestamps; a
+    result with word timestamps also serves a request without them.
+    Returns the Whisper result and the VAD statistics (None when VAD is disabled).
+    """
+    if language == 'auto':
+        language = None
+
+    start_time = time.time()
+    # Decode once: the PCM is used both for the cache key and for inference
+    audio = whisper.load_audio(media_path)
+    cache_key = None
+    if TRANSCRIPTION_CACHE_MAX_BYTES > 0:
+        audio_hash = hash_audio(audio)
+        cache_key = get_cache_key(audio_hash, model_size, task, language, word_timestamps, vad)
+        cached = find_cached_transcription(cache_key)
+        if cached is None and not word_timestamps:
+            # A transcript with word timestamps also answers a request without them
+            cached = find_cached_transcription(get_cache_key(audio_hash, model_size, task, language, True, vad))
+            if cached is not None:
+                cached['result'] = without_word_timestamps(cached['result'])
+        if cached is not None:
+            logger.info(f"Transcription cache hit for {media_path}")
+            return cached['result'], cached.get('vad_stats')
+
+    model = get_model(model_size)
+    model_lock = get_model_lock(model_size)
+
+    options = {
+        "task": task,
+        "word_timestamps": word_timestamps,
+        "verbose": verbose,
+        "fp16": model.device.type != 'cpu'
+    }
+    if language:
+        options["language"] = language
+
+    vad_stats = None
+    time_map = None
+    if vad:
+        # Drop silent stretches before inference and map timestamps back afterwards
+        audio, time_map, vad_stats = apply_vad(audio)
+
+    if len(audio) == 0:
+        logger.info("No speech detected, skipping inference")
+        result = {'text': '', 'segments': [], 'language': language}
+    elif can_batch(audio, word_timestamps):
+        # Short clips are decoded together with other jobs' clips arriving at the same time
+        result = get_batcher(model_size, model, model_lock).submit(audio, task, language).result()
+    else:
+        with model_lock:
+            result = model.transcribe(audio, **options)
+
+    if time_map is not None:
+        remap_transcription(result, time_map)
+
+    logger.info(f"Transcribed {media_path} in {time.time() - start_time:.2f}s")
+    if cache_key:
+        store_cached_transcription(cache_key, {'result': result, 'vad_stats': vad_stats})
+    return result, vad_stats